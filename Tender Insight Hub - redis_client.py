@@ -8,9 +8,11 @@ from redis.exceptions import RedisError
 from fastapi import HTTPException, status
 from contextlib import asynccontextmanager
 from typing import Optional, AsyncIterator, Union
+import asyncio
 import logging
 from datetime import timedelta
 from .config import settings
+from app import readiness
 
 logger = logging.getLogger(__name__)
 
@@ -21,15 +23,41 @@ class RedisClient:
         self.pool: Optional[redis.ConnectionPool] = None
         self.rate_limit_window = 60  # seconds
         self.max_connections = 20
+        self.warm_connections = 10  # opened during initialize, before the first request
+        self.ready = False  # True once the pool is warm; reported by GET /ready
+        readiness.register("redis", lambda: self.ready)
 
     async def initialize(self):
-        """Create connection pool on startup"""
+        """Create connection pool on startup, open and verify warm connections,
+        then report ready"""
         self.pool = redis.ConnectionPool.from_url(
             settings.REDIS_URL,
             max_connections=self.max_connections,
             decode_responses=True
         )
-        logger.info(f"Redis connection pool initialized with {self.max_connections} connections")
+        await self._warm_pool()
+        self.ready = True
+        logger.info(f"Redis connection pool initialized with {self.max_connections} connections, "
+                    f"{self.warm_connections} warm")
+
+    async def _warm_pool(self):
+        """Connect and PING warm_connections connections concurrently; the pool
+        is otherwise empty and connects on demand"""
+        count = min(self.warm_connections, self.max_connections)
+        connections = await asyncio.gather(
+            *(self.pool.get_connection("PING") for _ in range(count)),
+            return_exceptions=True
+        )
+        try:
+            for conn in connections:
+                if isinstance(conn, BaseException):
+                    raise conn
+                await conn.send_command("PING")
+                await conn.read_response()
+        finally:
+            for conn in connections:
+                if not isinstance(conn, BaseException):
+                    await self.pool.release(conn)
 
     @asynccontextmanager
     async def get_connection(self) -> AsyncIterator[redis.Redis]:
@@ -144,5 +172,6 @@ async def init_redis():
 async def close_redis():
     """Cleanup Redis connections on shutdown"""
     if redis_client.pool:
+        redis_client.ready = False
         await redis_client.pool.disconnect()
         logger.info("Redis connection pool closed")
\ No newline at end of file
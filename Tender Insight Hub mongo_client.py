@@ -4,26 +4,74 @@ Async MongoDB connection handling with tenant isolation and performance optimiza
 """
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from pymongo.errors import PyMongoError
+from pymongo.errors import ConnectionFailure, PyMongoError
+from pymongo.monitoring import ConnectionPoolListener
 from fastapi import HTTPException, status
 from contextlib import asynccontextmanager
 from typing import Optional, AsyncIterator
+import asyncio
 import logging
+import threading
 from .config import settings
 from .mongo_models import MONGO_INDEXES  # From your mongo_models.py
+from app import readiness
 
 logger = logging.getLogger(__name__)
 
+class OpenConnections(ConnectionPoolListener):
+    """Established connections per server, counted from pymongo's pool events"""
+
+    def __init__(self):
+        self.by_server = {}
+        self._lock = threading.Lock()
+
+    def at_least(self, count: int) -> bool:
+        """True once every ready server pool holds count connections"""
+        with self._lock:
+            return bool(self.by_server) and min(self.by_server.values()) >= count
+
+    def _add(self, address, delta: int):
+        with self._lock:
+            if address in self.by_server:
+                self.by_server[address] += delta
+
+    def pool_ready(self, event):
+        with self._lock:
+            self.by_server.setdefault(event.address, 0)
+
+    def pool_closed(self, event):
+        with self._lock:
+            self.by_server.pop(event.address, None)
+
+    def connection_ready(self, event):
+        self._add(event.address, 1)
+
+    def connection_closed(self, event):
+        self._add(event.address, -1)
+
+    # Not needed for the count
+    def pool_created(self, event): pass
+    def pool_cleared(self, event): pass
+    def connection_created(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_check_out_failed(self, event): pass
+    def connection_checked_out(self, event): pass
+    def connection_checked_in(self, event): pass
+
 class MongoClient:
     """MongoDB connection manager with built-in tenant isolation"""
     
     def __init__(self):
         self.client: Optional[AsyncIOMotorClient] = None
         self.db: Optional[AsyncIOMotorDatabase] = None
+        self.ready = False  # True once the pool is warm; reported by GET /ready
+        self.warmup_timeout = 10  # seconds to wait for minPoolSize connections
+        self.open_connections = OpenConnections()
+        readiness.register("mongo", lambda: self.ready)
         self._initialized = False
 
     async def initialize(self):
-        """Initialize connection pool and ensure indexes"""
+        """Initialize connection pool, warm it and ensure indexes, then report ready"""
         try:
             self.client = AsyncIOMotorClient(
                 settings.MONGO_URI,
@@ -31,17 +79,23 @@ class MongoClient:
                 minPoolSize=settings.MONGO_MIN_POOL_SIZE,
                 serverSelectionTimeoutMS=5000,
                 tls=settings.MONGO_TLS,
-                tlsInsecure=settings.MONGO_TLS_INSECURE
+                tlsInsecure=settings.MONGO_TLS_INSECURE,
+                event_listeners=[self.open_connections]
             )
             
-            # Verify connection
+            # Verify connection, then wait for the minimum pool. Concurrent pings
+            # would not fill it: pymongo opens at most maxConnecting connections
+            # at once and hands a returned one to the next waiting ping, so
+            # only its own background task reliably reaches minPoolSize
             await self.client.admin.command('ping')
+            await self._wait_for_min_pool()
             self.db = self.client[settings.MONGO_DB_NAME]
             
             # Ensure indexes
             await self._ensure_indexes()
             
             self._initialized = True
+            self.ready = True
             logger.info("MongoDB connection established with %s pool size", 
                        settings.MONGO_MAX_POOL_SIZE)
             
@@ -49,6 +103,18 @@ class MongoClient:
             logger.error("MongoDB connection failed: %s", str(e))
             raise
 
+    async def _wait_for_min_pool(self):
+        """Wait until every server pool holds MONGO_MIN_POOL_SIZE connections"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.warmup_timeout
+        while not self.open_connections.at_least(settings.MONGO_MIN_POOL_SIZE):
+            if loop.time() > deadline:
+                raise ConnectionFailure(
+                    f"MongoDB pool did not reach minPoolSize={settings.MONGO_MIN_POOL_SIZE} "
+                    f"within {self.warmup_timeout}s: {self.open_connections.by_server}"
+                )
+            await asyncio.sleep(0.05)
+
     async def _ensure_indexes(self):
         """Create all predefined indexes"""
         try:
@@ -130,6 +196,7 @@ class MongoClient:
     async def close(self):
         """Cleanup connections"""
         if self.client:
+            self.ready = False
             self.client.close()
             self._initialized = False
             logger.info("MongoDB connection closed")
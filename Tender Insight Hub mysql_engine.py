@@ -3,28 +3,49 @@ Tender Insight Hub - Async SQL Engine
 Database connection manager for MySQL/PostgreSQL with connection pooling and tenant isolation.
 """
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException, status
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Optional
+from typing import AsyncIterator, Iterable, Optional
+import asyncio
 import logging
+import time
 from .config import settings
 from .sql_models import Base  # From your sql_models.py
+from app.pool_metrics import InstrumentedAsyncQueuePool, PoolMetrics
+from app.tenancy import SET_TENANT, TenantSession, rls_policy_ddl
 
 logger = logging.getLogger(__name__)
 
 class DatabaseManager:
     """Async database connection manager with SaaS multi-tenant support"""
     
-    def __init__(self):
+    def __init__(self, warmup_statements: Iterable = ()):
         self.engine = None
         self.async_session = None
+        self.pool_metrics = None
+        self.row_level_security = settings.DB_TENANT_ISOLATION == "rls"
+        # (statement, params) run on every pooled connection during warm-up, so
+        # asyncpg has them prepared before the first request needs them; the
+        # hot statements must target this manager's own tables (Base.metadata)
+        self.warmup_statements = [(text("SELECT 1"), None), *warmup_statements]
+        if self.row_level_security:
+            self.warmup_statements.append((SET_TENANT, {"tenant_id": ""}))
+        self.ready = False  # True once the pool is warm; gate readiness probes on it
         self._initialized = False
 
+    def add_warmup_statement(self, stmt, params: Optional[dict] = None):
+        """Register a hot statement to prepare on each connection during warm-up"""
+        self.warmup_statements.append((stmt, params))
+
     async def initialize(self):
-        """Initialize database connection pool and verify connection"""
+        """Initialize the connection pool, open and warm pool_size connections,
+        then report ready"""
+        if self.row_level_security and settings.DB_ENGINE != "postgresql":
+            raise ValueError("DB_TENANT_ISOLATION=rls requires DB_ENGINE=postgresql")
         try:
             # Determine dialect-specific connection options
             if settings.DB_ENGINE == "postgresql":
@@ -44,41 +65,76 @@ class DatabaseManager:
 
             self.engine = create_async_engine(
                 db_url,
+                poolclass=InstrumentedAsyncQueuePool,
                 pool_size=pool_size,
                 max_overflow=settings.DB_MAX_OVERFLOW,
-                pool_pre_ping=True,
-                pool_recycle=3600,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+                pool_pre_ping=settings.DB_POOL_PRE_PING,
+                pool_recycle=settings.DB_POOL_RECYCLE,
                 echo=settings.SQL_ECHO,
                 connect_args=connect_args
             )
+            # Checkout waits, in-use/overflow and recycles, served by GET /metrics/pool
+            self.pool_metrics = PoolMetrics(settings.DB_ENGINE).attach(self.engine.sync_engine)
 
-            # Verify connection
-            async with self.engine.begin() as conn:
-                await conn.execute("SELECT 1")
+            # The hot statements need their tables before they can be prepared
+            if settings.CREATE_TABLES:
+                await self.create_tables()
+
+            # Verify connection and warm the whole pool before taking traffic
+            started = time.perf_counter()
+            await self._warm_pool(pool_size)
             
             self.async_session = sessionmaker(
                 self.engine,
                 expire_on_commit=False,
-                class_=AsyncSession
+                class_=AsyncSession,
+                sync_session_class=TenantSession
             )
             
             self._initialized = True
+            self.ready = True
             logger.info(
                 f"{settings.DB_ENGINE.upper()} connection pool initialized "
-                f"with size {pool_size}"
+                f"with size {pool_size}, overflow {settings.DB_MAX_OVERFLOW}, "
+                f"timeout {settings.DB_POOL_TIMEOUT}s; warmed in "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms"
             )
             
         except SQLAlchemyError as e:
             logger.error("Database connection failed: %s", str(e))
             raise
 
+    async def _warm_pool(self, pool_size: int):
+        """Open pool_size connections concurrently and run the warm-up
+        statements on each, so no request pays for connection setup"""
+        barrier = asyncio.Barrier(pool_size)
+
+        async def warm_connection():
+            try:
+                async with self.engine.connect() as conn:
+                    # Hold each connection until all are open, or the pool would reuse one
+                    await barrier.wait()
+                    for stmt, params in self.warmup_statements:
+                        await conn.execute(stmt, params)
+                    await conn.rollback()
+            except BaseException:
+                await barrier.abort()
+                raise
+
+        await asyncio.gather(*(warm_connection() for _ in range(pool_size)))
+
     @asynccontextmanager
-    async def get_session(self) -> AsyncIterator[AsyncSession]:
-        """Context manager for database sessions with automatic cleanup"""
+    async def get_session(self, tenant_id: Optional[str] = None) -> AsyncIterator[AsyncSession]:
+        """Context manager for database sessions with automatic cleanup;
+        ORM statements (or, in RLS mode, every transaction) are scoped to
+        tenant_id when one is given"""
         if not self._initialized:
             await self.initialize()
             
-        session = self.async_session()
+        session = self.async_session(
+            info={"tenant_id": tenant_id, "row_level_security": self.row_level_security}
+        )
         try:
             yield session
             await session.commit()
@@ -97,6 +153,9 @@ class DatabaseManager:
         try:
             async with self.engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
+                if self.row_level_security:
+                    for ddl in rls_policy_ddl(Base.registry, self.engine.dialect):
+                        await conn.execute(text(ddl))
             logger.info("Database tables created")
         except SQLAlchemyError as e:
             logger.error("Schema creation failed: %s", str(e))
@@ -114,17 +173,23 @@ class DatabaseManager:
 
     # ---- Tenant Isolation Helpers ----
     async def execute_for_tenant(self, tenant_id: str, stmt, session: AsyncSession):
-        """Add tenant_id filter to all queries"""
-        if not hasattr(stmt, 'where'):
-            return await session.execute(stmt)
-            
-        tenant_condition = getattr(stmt.table.columns, 'tenant_id') == tenant_id
-        stmt = stmt.where(tenant_condition)
-        return await session.execute(stmt)
+        """Execute stmt with every tenant-owned entity in it (joins included)
+        filtered to tenant_id, as a bound parameter (app/tenancy.py)"""
+        if self.row_level_security:
+            # The policies filter; switch the transaction's tenant for this call only,
+            # then put back the session's own tenant ('' matches no rows)
+            await session.execute(SET_TENANT, {"tenant_id": str(tenant_id)})
+            try:
+                return await session.execute(stmt)
+            finally:
+                restored = session.info.get("tenant_id")
+                await session.execute(SET_TENANT, {"tenant_id": "" if restored is None else str(restored)})
+        return await session.execute(stmt, execution_options={"tenant_id": tenant_id})
 
     async def close(self):
         """Cleanup connection pool"""
         if self.engine:
+            self.ready = False
             await self.engine.dispose()
             self._initialized = False
             logger.info("Database connection pool closed")
@@ -135,8 +200,6 @@ db_manager = DatabaseManager()
 async def init_db():
     """Initialize database on startup"""
     await db_manager.initialize()
-    if settings.CREATE_TABLES:
-        await db_manager.create_tables()
 
 async def close_db():
     """Cleanup database on shutdown"""
@@ -0,0 +1,34 @@
+"""
+AsyncSession counterparts of the tender reads in crud.py, for routes that
+opt in to database.get_async_db. Statements are shared with crud so both
+paths issue identical SQL; writes stay on the synchronous session.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import schemas
+from .crud import TENDER_FIELDS, build_page, tender_fields_statement, tenders_page_statement
+
+
+def hot_statements() -> list:
+    """
+    (statement, params) for the statements the async routes issue most, with
+    placeholder values; warming a pooled connection with them prepares the
+    same SQL text that requests then find in asyncpg's statement cache.
+    """
+    return [
+        # GET /tenders/{id} with the default fields
+        (tender_fields_statement(0, TENDER_FIELDS + ("change_seq",)), None),
+    ]
+
+
+async def get_tender_fields(db: AsyncSession, tender_id: int, fields: tuple = TENDER_FIELDS):
+    result = await db.execute(tender_fields_statement(tender_id, fields))
+    return result.first()
+
+
+async def get_tenders_page(db: AsyncSession, team_id: int, limit: int, cursor: str = None,
+                           filters: schemas.TenderFilters = None, sort: str = "deadline",
+                           fields: tuple = TENDER_FIELDS):
+    stmt, direction = tenders_page_statement(team_id, limit, cursor, filters, sort, fields)
+    result = await db.execute(stmt)
+    return build_page(result.all(), direction, limit, cursor, sort)
@@ -0,0 +1,102 @@
+"""
+Catch-up for the in-process tender indexes from the change feed.
+
+Every worker process holds its own copy of the search index and the
+closing-soon buckets. The crud write paths update the copy of the process
+that served the write; the others follow tenders.change_seq, applying every
+change after the last one they have seen. Only settled numbers are read
+(settled_changes), so nothing can later appear behind that point.
+"""
+import threading
+import time
+
+from sqlalchemy import BigInteger, String, cast, func, select, true
+
+from . import models
+
+CATCH_UP_BATCH_SIZE = 1000
+# On PostgreSQL a change_seq is the writing transaction's id shifted left by
+# this many bits plus a sequence draw in the low bits (crud.change_seq_value)
+CHANGE_SEQ_TXID_BITS = 24
+
+
+def settled_changes(dialect_name: str):
+    """
+    Condition keeping tenders.change_seq to numbers no open transaction can
+    still commit. On PostgreSQL writers do not wait for each other, so a
+    change is settled once its transaction id is below the oldest one still
+    running in the reader's snapshot; a long transaction holds the feed
+    back, never the writers. SQLite serializes writers, so every committed
+    number is settled.
+    """
+    if dialect_name != "postgresql":
+        return true()
+    xmin = cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), String), BigInteger)
+    return models.Tender.change_seq < xmin * (1 << CHANGE_SEQ_TXID_BITS)
+
+
+class ChangeFeedFollower:
+    """
+    Base for in-process copies of tender data. Subclasses name the Tender
+    `columns` they need and apply one change row (those columns, then
+    change_seq and deleted_at) in _apply_change().
+    """
+
+    columns = ()
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.last_seq = 0
+        self._refreshed_at = float("-inf")
+        self._catch_up_lock = threading.Lock()
+
+    def _start_following(self, db):
+        """Call before a full load; changes racing with the load are applied again."""
+        self.last_seq = db.scalar(
+            select(func.coalesce(func.max(models.Tender.change_seq), 0))
+            .where(settled_changes(db.get_bind().dialect.name))
+        )
+        self._refreshed_at = time.monotonic()
+
+    def _following(self) -> bool:
+        return True
+
+    def catch_up(self, db, force: bool = False) -> int:
+        """
+        Applies the changes written since the last catch-up, at most once per
+        refresh_seconds unless forced. Returns how many were applied; a
+        request that finds another thread catching up does not wait for it.
+        """
+        if not self._following():
+            return 0
+        if not force and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return 0
+        if not self._catch_up_lock.acquire(blocking=force):
+            return 0
+        try:
+            Tender = models.Tender
+            settled = settled_changes(db.get_bind().dialect.name)
+            applied = 0
+            while True:
+                stmt = (
+                    select(*(getattr(Tender, name) for name in self.columns),
+                           Tender.change_seq, Tender.deleted_at)
+                    .where(Tender.change_seq > self.last_seq, settled)
+                    .order_by(Tender.change_seq)
+                    .limit(CATCH_UP_BATCH_SIZE)
+                )
+                rows = db.execute(stmt).all()
+                for row in rows:
+                    self._apply_change(row)
+                if rows:
+                    self.last_seq = rows[-1].change_seq
+                    applied += len(rows)
+                if len(rows) < CATCH_UP_BATCH_SIZE:
+                    break
+            self._refreshed_at = time.monotonic()
+            return applied
+        finally:
+            self._catch_up_lock.release()
+
+    def _apply_change(self, row):
+        raise NotImplementedError
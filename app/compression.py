@@ -0,0 +1,48 @@
+"""
+Transparent compression of large note bodies.
+
+Bodies of NOTE_COMPRESSION_THRESHOLD_BYTES or more are stored compressed in
+notes.content_z, while notes.content keeps a plain-text excerpt of the first
+NOTE_EXCERPT_CHARS characters. Listings read only the excerpt and flag it as
+truncated; the full body is decompressed when it is actually asked for. The
+full-text index is built from the full body (app/fulltext.py).
+
+Every blob starts with a format marker naming its codec, so zlib and zstd
+blobs can coexist and the codec can change without rewriting old rows.
+"""
+import zlib
+
+from core.settings import settings
+
+try:
+    import zstandard
+except ImportError:  # zlib is used when zstandard is not installed
+    zstandard = None
+
+ZLIB_MARKER = b"ZL1\x00"
+ZSTD_MARKER = b"ZS1\x00"
+
+
+def compress_text(text: str) -> bytes:
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        return ZSTD_MARKER + zstandard.ZstdCompressor(level=10).compress(data)
+    return ZLIB_MARKER + zlib.compress(data, 6)
+
+
+def decompress_text(blob: bytes) -> str:
+    marker, payload = bytes(blob[:4]), bytes(blob[4:])
+    if marker == ZLIB_MARKER:
+        return zlib.decompress(payload).decode("utf-8")
+    if marker == ZSTD_MARKER:
+        if zstandard is None:
+            raise RuntimeError("Note body is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown note compression marker {marker!r}")
+
+
+def note_content(text: str) -> dict:
+    """Column values for a note body: inline when small, excerpt + blob when large."""
+    if text is None or len(text.encode("utf-8")) < settings.NOTE_COMPRESSION_THRESHOLD_BYTES:
+        return {"content": text, "content_z": None}
+    return {"content": text[:settings.NOTE_EXCERPT_CHARS], "content_z": compress_text(text)}
@@ -1,31 +1,530 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+from pydantic import ValidationError
+from sqlalchemy import (BigInteger, String, and_, case, cast, func, insert, literal, or_, select,
+                        tuple_, union_all, update)
 from sqlalchemy.orm import Session
-from . import models, schemas
+from core.settings import settings
+
+from . import fulltext, models, schemas
+from .change_feed import CHANGE_SEQ_TXID_BITS, settled_changes
+from .deadline_index import closing_soon_index
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+from .search_index import tender_index
+from .single_flight import tender_lists, tender_reads
+from .team_cache import TeamCache, normalized_key
+
+BULK_CHUNK_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+CHANGES_PAGE_SIZE = 500
+LOOKUP_BATCH_SIZE = 1000  # ids per primary-key IN list
+TENDER_FIELDS = models.TENDER_FIELDS
+TENDER_COLUMNS = [getattr(models.Tender, name) for name in TENDER_FIELDS]
+# Soft-deleted tenders stay in the table as change feed tombstones
+NOT_DELETED = models.Tender.deleted_at.is_(None)
+
+facet_cache = TeamCache(ttl=settings.FACET_CACHE_TTL_SECONDS)
+
+def tender_saved(tender):
+    """Brings the in-process indexes and caches up to date after a tender was written."""
+    tenders_saved([tender])
+
+def tenders_saved(tenders, team_ids=()):
+    """
+    tender_saved() for a batch: per-tender entries are updated one by one,
+    team-wide caches dropped once per team. team_ids names further teams
+    that were written to by rows that could not be read back.
+    """
+    teams = set(team_ids)
+    for tender in tenders:
+        tender_index.add(tender)
+        closing_soon_index.add(tender)
+        tender_reads.invalidate(tender.tender_id)
+        teams.add(tender.team_id)
+    for team_id in teams:
+        facet_cache.invalidate(team_id)
+        tender_lists.invalidate(team_id)
+
+def tender_deleted(tender):
+    tender_index.remove(tender.tender_id)
+    closing_soon_index.remove(tender.tender_id)
+    facet_cache.invalidate(tender.team_id)
+    tender_reads.invalidate(tender.tender_id)
+    tender_lists.invalidate(tender.team_id)
+
+def change_seq_value(dialect_name: str):
+    """
+    SQL expression numbering the next tender write for the change feed.
+
+    A number is drawn when the row is written but only becomes visible at
+    commit, so a slow transaction can commit below a number a reader has
+    already passed. On PostgreSQL the number therefore leads with the
+    writing transaction's id, and readers only take the numbers settled
+    below the oldest running transaction (change_feed.settled_changes);
+    the low bits, a sequence draw, order the rows of one transaction.
+    """
+    if dialect_name == "postgresql":
+        txid = cast(cast(func.pg_current_xact_id(), String), BigInteger)
+        low = 1 << CHANGE_SEQ_TXID_BITS
+        return txid * low + models.TENDER_CHANGE_SEQ.next_value() % low
+    # SQLite serializes writers, so max + 1 cannot be handed out twice
+    return select(func.coalesce(func.max(models.Tender.change_seq), 0) + 1).scalar_subquery()
 
 def create_tender(db: Session, tender: schemas.TenderCreate):
     db_tender = models.Tender(**tender.dict())
+    db_tender.change_seq = change_seq_value(db.get_bind().dialect.name)
     db.add(db_tender)
     db.commit()
     db.refresh(db_tender)
+    tender_saved(db_tender)
     return db_tender
 
+def bulk_create_tenders(db: Session, records: list, chunk_size: int = BULK_CHUNK_SIZE):
+    """
+    Validates and inserts records chunk by chunk in a single transaction.
+    Each chunk is one executemany-style INSERT; rows are not refreshed, only
+    their generated ids are read back where the dialect can return them.
+    """
+    results = []
+    inserted = []
+    teams = set()
+    created = 0
+    for start in range(0, len(records), chunk_size):
+        valid, indexes = [], []
+        for index, record in enumerate(records[start:start + chunk_size], start):
+            try:
+                valid.append(schemas.TenderCreate.parse_obj(record).dict())
+                indexes.append(index)
+            except ValidationError as exc:
+                errors = [{"loc": list(e["loc"]), "msg": e["msg"]} for e in exc.errors()]
+                results.append({"index": index, "status": "invalid", "errors": errors})
+        if not valid:
+            continue
+        for index, row, tender_id in zip(indexes, valid, _insert_tender_rows(db, valid)):
+            results.append({"index": index, "status": "created", "tender_id": tender_id})
+            teams.add(row["team_id"])
+            if tender_id is not None:
+                inserted.append(SimpleNamespace(tender_id=tender_id, **row))
+        created += len(valid)
+    db.commit()
+    tenders_saved(inserted, teams)
+    results.sort(key=lambda r: r["index"])
+    return {"created": created, "failed": len(records) - created, "results": results}
+
+def _insert_tender_rows(db: Session, rows: list):
+    dialect = db.get_bind().dialect
+    # Numbered inside the INSERT, so on SQLite max + 1 is read under the write lock
+    stmt = insert(models.Tender).values(change_seq=change_seq_value(dialect.name))
+    if getattr(dialect, "insert_executemany_returning_sort_by_parameter_order", False):
+        stmt = stmt.returning(models.Tender.tender_id, sort_by_parameter_order=True)
+        return db.scalars(stmt, rows).all()
+    db.execute(stmt, rows)
+    return [None] * len(rows)
+
 def get_tenders(db: Session, team_id: int):
-    return db.query(models.Tender).filter(models.Tender.team_id == team_id).all()
+    return db.query(models.Tender).filter(models.Tender.team_id == team_id, NOT_DELETED).all()
+
+SORT_COLUMNS = {"deadline": models.Tender.deadline, "budget": models.Tender.budget}
+
+def tender_filter_conditions(team_id: int, filters: schemas.TenderFilters = None):
+    Tender = models.Tender
+    conditions = [Tender.team_id == team_id, NOT_DELETED]
+    if filters is None:
+        return conditions
+    if filters.province is not None:
+        conditions.append(Tender.province == filters.province)
+    if filters.buyer is not None:
+        conditions.append(Tender.buyer == filters.buyer)
+    if filters.deadline_from is not None:
+        conditions.append(Tender.deadline >= filters.deadline_from)
+    if filters.deadline_to is not None:
+        conditions.append(Tender.deadline <= filters.deadline_to)
+    if filters.min_budget is not None:
+        conditions.append(Tender.budget >= filters.min_budget)
+    if filters.max_budget is not None:
+        conditions.append(Tender.budget <= filters.max_budget)
+    return conditions
+
+def parse_fields(fields: str = None) -> tuple:
+    """
+    Validates a ?fields= list; None or empty means every tender field, and a
+    list that names none (",") is rejected rather than selecting nothing.
+    """
+    if not fields:
+        return TENDER_FIELDS
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    if not names:
+        raise ValueError("fields must name at least one field")
+    unknown = [name for name in names if name not in TENDER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+def tenders_page_statement(team_id: int, limit: int, cursor: str = None,
+                           filters: schemas.TenderFilters = None, sort: str = "deadline",
+                           fields: tuple = TENDER_FIELDS):
+    """
+    Builds the SELECT for one keyset page; returns (statement, direction).
+
+    Only the requested fields are selected, followed by whichever keyset
+    columns (sort column, tender_id) were not requested.
+
+    Rows are ordered by (sort column, tender_id) with NULLs last, and
+    "-column" is the exact reverse. Non-NULL and NULL sort values are read
+    as separate segments (_keyset_segments), each an index seek on one of
+    the (team_id, ..., tender_id) composite indexes bounded by the limit,
+    so a page costs the same however deep the cursor is.
+    """
+    Tender = models.Tender
+    descending = sort.startswith("-")
+    name = sort.lstrip("-")
+    keys = tuple(k for k in (name, "tender_id") if k not in fields)
+    columns = [getattr(Tender, field) for field in fields + keys]
+    conditions = tender_filter_conditions(team_id, filters)
+    direction, after = "next", None
+    if cursor:
+        key, direction = decode_cursor(cursor)
+        if key.get("sort") != sort:
+            raise InvalidCursor("Cursor was issued for a different sort order")
+        after = (key["value"], key["tender_id"])
+
+    ascending = descending == (direction == "prev")
+    parts = [
+        select(*columns).where(*conditions, condition).order_by(*order_by).limit(limit + 1)
+        for condition, order_by in _keyset_segments(SORT_COLUMNS[name], after, ascending)
+    ]
+    if len(parts) == 1:
+        return parts[0], direction
+    page = union_all(*(select(part.subquery()) for part in parts)).subquery("page")
+    if ascending:
+        order_by = (page.c[name].asc().nulls_last(), page.c.tender_id.asc())
+    else:
+        order_by = (page.c[name].desc().nulls_first(), page.c.tender_id.desc())
+    return select(*page.c).order_by(*order_by).limit(limit + 1), direction
+
+def _keyset_segments(column, after, ascending):
+    """
+    (condition, order_by) for the index ranges a page walks, in walk order:
+    the rows after `after` ((value, tender_id), None for the first page) in
+    ascending NULLS LAST order, or before it. A range that starts at a value
+    is written `column >= value AND (column > value OR tender_id > id)` so
+    the index can seek to it; an OR that also admits NULLs cannot be. The
+    NULL segment only contributes once the non-NULL rows run out.
+    """
+    tender_id = models.Tender.tender_id
+    if ascending:
+        non_null = (column.asc(), tender_id.asc())
+        nulls = (column.is_(None), (tender_id.asc(),))
+        if after is None:
+            return [(column.isnot(None), non_null), nulls]
+        value, last_id = after
+        if value is None:
+            return [(and_(column.is_(None), tender_id > last_id), (tender_id.asc(),))]
+        return [(and_(column >= value, or_(column > value, tender_id > last_id)), non_null), nulls]
+
+    non_null = (column.desc(), tender_id.desc())
+    if after is None:
+        return [(column.is_(None), (tender_id.desc(),)), (column.isnot(None), non_null)]
+    value, last_id = after
+    if value is None:
+        return [(and_(column.is_(None), tender_id < last_id), (tender_id.desc(),)),
+                (column.isnot(None), non_null)]
+    return [(and_(column <= value, or_(column < value, tender_id < last_id)), non_null)]
+
+def get_tenders_page(db: Session, team_id: int, limit: int, cursor: str = None,
+                     filters: schemas.TenderFilters = None, sort: str = "deadline",
+                     fields: tuple = TENDER_FIELDS):
+    """
+    Keyset page of a team's tenders with next/prev cursors. The cost of a
+    page does not grow with how deep the client has paged. Items are column
+    tuples that start with `fields` in order, not ORM instances.
+    """
+    stmt, direction = tenders_page_statement(team_id, limit, cursor, filters, sort, fields)
+    return build_page(db.execute(stmt).all(), direction, limit, cursor, sort)
+
+def get_tenders_page_with_version(db: Session, team_id: int, limit: int, cursor: str = None,
+                                  filters: schemas.TenderFilters = None, sort: str = "deadline",
+                                  fields: tuple = TENDER_FIELDS):
+    """
+    get_tenders_page() plus the page's version for its ETag: the
+    (tender_id, change_seq) of every row read, the probe row included as it
+    decides the cursors. A write that changes the page adds, drops or
+    renumbers one of those rows, so it always changes the version.
+    """
+    stmt, direction = tenders_page_statement(team_id, limit, cursor, filters, sort,
+                                             fields + ("change_seq",))
+    rows = db.execute(stmt).all()
+    version = [(row.tender_id, row.change_seq) for row in rows]
+    return build_page(rows, direction, limit, cursor, sort), version
+
+def build_page(rows: list, direction: str, limit: int, cursor: str, sort: str):
+    """Trims the limit + 1 probe row and derives the next/prev cursors."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or direction == "prev":
+            next_cursor = encode_cursor(_keyset_key(rows[-1], sort), "next")
+        if cursor and (has_more or direction == "next"):
+            prev_cursor = encode_cursor(_keyset_key(rows[0], sort), "prev")
+    return {"items": rows, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
+def _keyset_key(tender, sort):
+    value = getattr(tender, sort.lstrip("-"))
+    return {"sort": sort, "value": value, "tender_id": tender.tender_id}
+
+
+def export_tenders_statement(team_id: int):
+    """A team's tenders in tender_id order, read along ix_tenders_team_tender."""
+    return (
+        select(*TENDER_COLUMNS)
+        .where(models.Tender.team_id == team_id, NOT_DELETED)
+        .order_by(models.Tender.tender_id)
+    )
+
+def iter_tender_batches(db: Session, team_id: int, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Streams a team's tenders as batches of column tuples from a server-side
+    cursor, so only one batch is held in memory at a time.
+    """
+    stmt = export_tenders_statement(team_id).execution_options(yield_per=batch_size)
+    for batch in db.execute(stmt).partitions():
+        yield batch
+
+def closing_soon_statement(team_id: int, start: date, end: date):
+    """Range scan on ix_tenders_team_deadline, in deadline order."""
+    return (
+        select(*TENDER_COLUMNS)
+        .where(models.Tender.team_id == team_id, NOT_DELETED,
+               models.Tender.deadline >= start, models.Tender.deadline <= end)
+        .order_by(models.Tender.deadline, models.Tender.tender_id)
+    )
+
+def get_closing_soon(db: Session, team_id: int, days: int, today: date = None):
+    """
+    A team's tenders due from today through today + days, soonest first, as
+    row tuples in TENDER_FIELDS order. Once the day buckets are loaded they
+    pick the tenders and only those rows are read, by primary key; until
+    then the range comes from the database.
+    """
+    today = today or date.today()
+    if not closing_soon_index.loaded:
+        return db.execute(closing_soon_statement(team_id, today, today + timedelta(days=days))).all()
+    closing_soon_index.catch_up(db)
+    tender_ids = closing_soon_index.closing_soon(team_id, days, today)
+    by_id = {}
+    for start in range(0, len(tender_ids), LOOKUP_BATCH_SIZE):
+        batch = tender_ids[start:start + LOOKUP_BATCH_SIZE]
+        by_id.update((row.tender_id, row) for row in db.execute(
+            select(*TENDER_COLUMNS).where(models.Tender.tender_id.in_(batch), NOT_DELETED)
+        ))
+    return [by_id[tender_id] for tender_id in tender_ids if tender_id in by_id]
+
+# (label, lower bound inclusive, upper bound exclusive); NULL budgets fall in no band
+BUDGET_BANDS = (
+    ("under_100k", None, 100_000),
+    ("100k_1m", 100_000, 1_000_000),
+    ("1m_10m", 1_000_000, 10_000_000),
+    ("10m_plus", 10_000_000, None),
+)
+FACETS = ("province", "buyer", "budget_band")
+GROUPING_SETS_DIALECTS = {"postgresql", "mssql", "oracle"}
+
+def budget_band_expression():
+    budget = models.Tender.budget
+    whens = []
+    for label, low, high in BUDGET_BANDS:
+        bounds = []
+        if low is not None:
+            bounds.append(budget >= low)
+        if high is not None:
+            bounds.append(budget < high)
+        whens.append((and_(*bounds), label))
+    return case(*whens, else_=None)
+
+def tender_facets_statement(team_id: int, filters: schemas.TenderFilters = None,
+                            dialect_name: str = "postgresql"):
+    """
+    One statement yielding (facet, value, count) rows for every facet plus a
+    ("total", None, n) row. Where the database has GROUPING SETS the filtered
+    rows are scanned once; elsewhere the per-facet GROUP BYs are UNION ALLed.
+    """
+    Tender = models.Tender
+    base = select(
+        Tender.province.label("province"),
+        Tender.buyer.label("buyer"),
+        budget_band_expression().label("budget_band"),
+    ).where(*tender_filter_conditions(team_id, filters)).subquery("filtered")
+    columns = [base.c[name] for name in FACETS]
+    count = func.count().label("count")
+
+    if dialect_name in GROUPING_SETS_DIALECTS:
+        facet = case(
+            *((func.grouping(column) == 0, name) for name, column in zip(FACETS, columns)),
+            else_="total",
+        ).label("facet")
+        return select(facet, func.coalesce(*columns).label("value"), count).group_by(
+            func.grouping_sets(*columns, tuple_())
+        )
+
+    parts = [
+        select(literal(name).label("facet"), column.label("value"), count).group_by(column)
+        for name, column in zip(FACETS, columns)
+    ]
+    parts.append(select(literal("total"), literal(None), count).select_from(base))
+    return union_all(*parts)
+
+def get_tender_facets(db: Session, team_id: int, filters: schemas.TenderFilters = None):
+    """
+    Counts by province, buyer and budget band plus the total for a filter
+    set, most frequent values first. Cached per team and normalized filters
+    until the next write to the team.
+    """
+    params = filters.dict() if filters is not None else {}
+    key = normalized_key(params)
+    facets = facet_cache.get(team_id, key)
+    if facets is not None:
+        return facets
+
+    generation = facet_cache.generation(team_id)
+    stmt = tender_facets_statement(team_id, filters, db.get_bind().dialect.name)
+    facets = {name: [] for name in FACETS}
+    facets["total"] = 0
+    for facet, value, n in db.execute(stmt):
+        if facet == "total":
+            facets["total"] = n
+        else:
+            facets[facet].append({"value": value, "count": n})
+    for name in FACETS:
+        facets[name].sort(key=lambda item: (-item["count"], item["value"] is None, item["value"] or ""))
+    facet_cache.set(team_id, key, facets, generation)
+    return facets
 
 def get_tender(db: Session, tender_id: int):
-    return db.query(models.Tender).filter(models.Tender.tender_id == tender_id).first()
+    return db.query(models.Tender).filter(models.Tender.tender_id == tender_id, NOT_DELETED).first()
+
+def tender_fields_statement(tender_id: int, fields: tuple = TENDER_FIELDS):
+    columns = [getattr(models.Tender, name) for name in fields]
+    return select(*columns).where(models.Tender.tender_id == tender_id, NOT_DELETED)
+
+def get_tender_fields(db: Session, tender_id: int, fields: tuple = TENDER_FIELDS):
+    """Loads only the given columns of one tender, as a row tuple."""
+    return db.execute(tender_fields_statement(tender_id, fields)).first()
+
+def search_tenders(db: Session, q: str, team_id: int, province: str = None,
+                   min_budget: float = None, max_budget: float = None, limit: int = 20,
+                   offset: int = 0):
+    if settings.SEARCH_BACKEND == "database":
+        rows = fulltext.search_tenders(db, q, team_id, province, min_budget, max_budget,
+                                       limit, offset)
+        return [{"tender": tender, "score": score} for tender, score in rows]
+
+    tender_index.catch_up(db)
+    hits = tender_index.search(q, team_id=team_id, province=province,
+                               min_budget=min_budget, max_budget=max_budget,
+                               limit=limit + offset)[offset:]
+    if not hits:
+        return []
+    rows = db.query(models.Tender).filter(
+        models.Tender.tender_id.in_([h[0] for h in hits]), NOT_DELETED
+    )
+    by_id = {row.tender_id: row for row in rows}
+    return [
+        {"tender": by_id[tender_id], "score": score}
+        for tender_id, score in hits if tender_id in by_id
+    ]
 
 def update_tender(db: Session, tender_id: int, tender: schemas.TenderUpdate):
+    """
+    Applies the update with a single UPDATE ... RETURNING round trip and
+    returns the updated row, or None when the tender does not exist.
+    """
+    values = tender.dict(exclude_unset=True)
+    if not values or not db.get_bind().dialect.update_returning:
+        return _update_tender_loaded(db, tender_id, values)
+    row = db.execute(update_tender_statement(tender_id, values, db.get_bind().dialect.name)).first()
+    db.commit()
+    if row:
+        tender_saved(row)
+    return row
+
+def update_tender_statement(tender_id: int, values: dict, dialect_name: str = "postgresql"):
+    return (
+        update(models.Tender)
+        .where(models.Tender.tender_id == tender_id, NOT_DELETED)
+        .values(**values, change_seq=change_seq_value(dialect_name))
+        .returning(*TENDER_COLUMNS)
+    )
+
+def _update_tender_loaded(db: Session, tender_id: int, values: dict):
     db_tender = get_tender(db, tender_id)
-    if db_tender:
-        for key, value in tender.dict(exclude_unset=True).items():
+    if db_tender and values:
+        for key, value in values.items():
             setattr(db_tender, key, value)
+        db_tender.change_seq = change_seq_value(db.get_bind().dialect.name)
         db.commit()
         db.refresh(db_tender)
+        tender_saved(db_tender)
     return db_tender
 
 def delete_tender(db: Session, tender_id: int):
+    """
+    Soft-deletes with a single UPDATE ... RETURNING and returns the removed
+    row. The row stays behind as a tombstone for the change feed.
+    """
+    if not db.get_bind().dialect.update_returning:
+        return _delete_tender_loaded(db, tender_id)
+    row = db.execute(delete_tender_statement(tender_id, db.get_bind().dialect.name)).first()
+    db.commit()
+    if row:
+        tender_deleted(row)
+    return row
+
+def delete_tender_statement(tender_id: int, dialect_name: str = "postgresql"):
+    return (
+        update(models.Tender)
+        .where(models.Tender.tender_id == tender_id, NOT_DELETED)
+        .values(deleted_at=func.now(), change_seq=change_seq_value(dialect_name))
+        .returning(*TENDER_COLUMNS)
+    )
+
+def _delete_tender_loaded(db: Session, tender_id: int):
     db_tender = get_tender(db, tender_id)
     if db_tender:
-        db.delete(db_tender)
+        db_tender.deleted_at = func.now()
+        db_tender.change_seq = change_seq_value(db.get_bind().dialect.name)
         db.commit()
+        tender_deleted(db_tender)
     return db_tender
+
+def tender_changes_statement(team_id: int, since: int = 0, limit: int = CHANGES_PAGE_SIZE,
+                             dialect_name: str = "postgresql"):
+    """Keyset range on ix_tenders_team_change_seq, tombstones included."""
+    Tender = models.Tender
+    return (
+        select(*TENDER_COLUMNS, Tender.change_seq, Tender.deleted_at)
+        .where(Tender.team_id == team_id, Tender.change_seq > since, settled_changes(dialect_name))
+        .order_by(Tender.change_seq)
+        .limit(limit + 1)
+    )
+
+def get_tender_changes(db: Session, team_id: int, since: int = 0, limit: int = CHANGES_PAGE_SIZE):
+    """
+    Tenders of a team inserted, updated or soft-deleted after change `since`,
+    oldest change first, with the `since` to pass for the next page. Rows
+    are column tuples: TENDER_FIELDS, then change_seq and deleted_at.
+    Only settled numbers are returned (see change_seq_value), so nothing
+    can later appear at or below next_since.
+    """
+    stmt = tender_changes_statement(team_id, since, limit, db.get_bind().dialect.name)
+    rows = db.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "changes": rows,
+        "next_since": rows[-1].change_seq if rows else since,
+        "has_more": has_more,
+    }
@@ -0,0 +1,130 @@
+"""
+In-process day buckets of open tenders for the "closing soon" view.
+
+Each bucket holds the ids of the tenders whose deadline falls on that day,
+grouped by team, so a query for the next N days touches N buckets and the
+tenders it returns, never the rest of the team; the rows themselves are
+read by primary key. Buckets for past days are dropped as the date rolls
+over. Every worker process holds its own copy: the crud write paths update
+it in the process that wrote, and catch_up() applies the change feed at
+most IN_PROCESS_INDEX_REFRESH_SECONDS behind the database.
+"""
+import heapq
+import threading
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from core.settings import settings
+
+from . import models
+from .change_feed import ChangeFeedFollower
+
+LOAD_BATCH_SIZE = 5000
+
+
+class ClosingSoonIndex(ChangeFeedFollower):
+    columns = ("tender_id", "team_id", "deadline")
+
+    def __init__(self, refresh_seconds: float = settings.IN_PROCESS_INDEX_REFRESH_SECONDS):
+        super().__init__(refresh_seconds)
+        self._lock = threading.RLock()
+        # Until load() has run the buckets would be incomplete, so writes are
+        # ignored and callers fall back to the database.
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._days = {}  # deadline -> {team_id: set of tender_ids}
+        self._day_of = {}  # tender_id -> (deadline, team_id), needed to move or remove a tender
+        self._heap = []  # bucket dates, oldest first, for eviction
+
+    def __len__(self):
+        return len(self._day_of)
+
+    def add(self, tender, today: date = None):
+        """Files (or re-files) any object exposing the Tender attributes."""
+        if not self.loaded:
+            return
+        today = today or date.today()
+        with self._lock:
+            self._evict(today)
+            self._add(tender, today)
+
+    def _add(self, tender, today):
+        self._remove(tender.tender_id)
+        deadline = tender.deadline
+        if deadline is None or deadline < today:
+            return
+        bucket = self._days.get(deadline)
+        if bucket is None:
+            bucket = self._days[deadline] = {}
+            heapq.heappush(self._heap, deadline)
+        bucket.setdefault(tender.team_id, set()).add(tender.tender_id)
+        self._day_of[tender.tender_id] = (deadline, tender.team_id)
+
+    def remove(self, tender_id: int):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(tender_id)
+
+    def _remove(self, tender_id):
+        slot = self._day_of.pop(tender_id, None)
+        if slot is None:
+            return
+        deadline, team_id = slot
+        bucket = self._days[deadline]
+        team_rows = bucket[team_id]
+        team_rows.discard(tender_id)
+        if not team_rows:
+            del bucket[team_id]
+        if not bucket:
+            del self._days[deadline]
+
+    def _evict(self, today):
+        while self._heap and self._heap[0] < today:
+            bucket = self._days.pop(heapq.heappop(self._heap), None)
+            for team_rows in (bucket or {}).values():
+                for tender_id in team_rows:
+                    del self._day_of[tender_id]
+
+    def closing_soon(self, team_id: int, days: int, today: date = None) -> list:
+        """Ids of the tenders due from today through today + days, soonest first."""
+        today = today or date.today()
+        tender_ids = []
+        with self._lock:
+            self._evict(today)
+            for offset in range(days + 1):
+                bucket = self._days.get(today + timedelta(days=offset))
+                if bucket and team_id in bucket:
+                    tender_ids.extend(sorted(bucket[team_id]))
+        return tender_ids
+
+    def _following(self) -> bool:
+        return self.loaded
+
+    def _apply_change(self, row):
+        if row.deleted_at is not None:
+            self.remove(row.tender_id)
+        else:
+            self.add(row)
+
+    def load(self, db, today: date = None):
+        """Rebuilds the buckets from every tender whose deadline has not passed."""
+        today = today or date.today()
+        columns = [getattr(models.Tender, name) for name in self.columns]
+        stmt = (
+            select(*columns)
+            .where(models.Tender.deadline >= today, models.Tender.deleted_at.is_(None))
+            .execution_options(yield_per=LOAD_BATCH_SIZE)
+        )
+        with self._lock:
+            self._reset()
+            self._start_following(db)
+            for row in db.execute(stmt):
+                self._add(row, today)
+            self.loaded = True
+
+
+closing_soon_index = ClosingSoonIndex()
@@ -0,0 +1,44 @@
+"""
+Strong ETags for tender reads, built from Tender.change_seq, and the
+If-None-Match check that lets a route answer 304 before serializing.
+"""
+import hashlib
+from functools import cached_property
+from typing import Optional
+
+from fastapi.responses import Response
+
+from .serialization import dumps
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag over the parts that identify one representation."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+class Representation:
+    """An ETag and its payload; the body is serialized on first use, so a 304 never pays for it."""
+
+    def __init__(self, etag: str, payload):
+        self.etag = etag
+        self.payload = payload
+
+    @cached_property
+    def body(self) -> bytes:
+        return dumps(self.payload)
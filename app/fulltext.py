@@ -0,0 +1,271 @@
+"""
+Database-native full-text search for tenders and workspace notes.
+
+PostgreSQL uses the GIN expression index from architecture/database-design.md
+and ranks with ts_rank; SQLite (local and test runs) keeps FTS5 shadow tables
+and ranks with bm25(). Notes are indexed from their full bodies, which the
+notes table itself only holds in compressed form once they grow large.
+"""
+from sqlalchemy import (Float, Uuid, and_, bindparam, cast, column, func, insert, inspect,
+                        literal_column, or_, select, table, text)
+
+from . import models
+from .compression import decompress_text
+from .search_index import tokenize
+
+# Must stay textually identical to the indexed expression for the planner to use it.
+# Title, buyer and description are weighted A, B and C, like the FTS5 columns below.
+PG_TENDER_VECTOR = (
+    "(setweight(to_tsvector('english', tenders.title), 'A') || "
+    "setweight(to_tsvector('english', coalesce(tenders.buyer, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(tenders.description, '')), 'C'))"
+)
+
+PG_DDL = [
+    "DROP INDEX IF EXISTS idx_tenders_search",  # the earlier index over title and description only
+    "CREATE INDEX IF NOT EXISTS idx_tenders_fulltext ON tenders USING gin ("
+    + PG_TENDER_VECTOR.replace("tenders.", "") + ")",
+]
+
+# ts_rank() weights for D, C, B and A lexemes: description 1, buyer 2, title 3,
+# the ratios of search_index.FIELD_WEIGHTS
+PG_RANK_WEIGHTS = "'{0, 0.333, 0.667, 1}'::float4[]"
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE tenders_fts USING fts5("
+    "title, description, buyer, content='tenders', content_rowid='tender_id')",
+    "CREATE TRIGGER IF NOT EXISTS tenders_fts_ai AFTER INSERT ON tenders BEGIN "
+    "INSERT INTO tenders_fts(rowid, title, description, buyer) "
+    "VALUES (new.tender_id, new.title, new.description, new.buyer); END",
+    "CREATE TRIGGER IF NOT EXISTS tenders_fts_ad AFTER DELETE ON tenders BEGIN "
+    "INSERT INTO tenders_fts(tenders_fts, rowid, title, description, buyer) "
+    "VALUES ('delete', old.tender_id, old.title, old.description, old.buyer); END",
+    "CREATE TRIGGER IF NOT EXISTS tenders_fts_au AFTER UPDATE ON tenders BEGIN "
+    "INSERT INTO tenders_fts(tenders_fts, rowid, title, description, buyer) "
+    "VALUES ('delete', old.tender_id, old.title, old.description, old.buyer); "
+    "INSERT INTO tenders_fts(rowid, title, description, buyer) "
+    "VALUES (new.tender_id, new.title, new.description, new.buyer); END",
+    # Index rows that existed before the shadow table did
+    "INSERT INTO tenders_fts(tenders_fts) VALUES ('rebuild')",
+]
+
+# bm25() column weights in FTS5 column order, matching search_index.FIELD_WEIGHTS
+SQLITE_RANK = "-bm25(tenders_fts, 3.0, 1.0, 2.0)"
+
+tenders_fts = table("tenders_fts", column("rowid"))
+
+# Notes are indexed by the application rather than from notes.content, which
+# only holds an excerpt of compressed bodies (app/compression.py). Writers
+# call index_notes() with the full text in the same transaction as the INSERT.
+PG_NOTE_DDL = [
+    "DROP INDEX IF EXISTS idx_notes_search",  # the earlier expression index over notes.content
+    "CREATE TABLE IF NOT EXISTS note_search ("
+    "note_id uuid PRIMARY KEY REFERENCES notes (id) ON DELETE CASCADE, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_note_search_document ON note_search USING gin (document)",
+]
+
+# Keyed on the note's UUID rather than the implicit rowid, which VACUUM may renumber
+# for a table like notes that has no INTEGER PRIMARY KEY
+SQLITE_NOTE_DDL = [
+    "CREATE VIRTUAL TABLE notes_fts USING fts5(note_id UNINDEXED, title, content)",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN "
+    "DELETE FROM notes_fts WHERE note_id = old.id; END",
+]
+
+# Earlier trigger-maintained layouts; replaced on install
+SQLITE_NOTE_LEGACY_DROP = [
+    "DROP TRIGGER IF EXISTS notes_fts_ai",
+    "DROP TRIGGER IF EXISTS notes_fts_ad",
+    "DROP TRIGGER IF EXISTS notes_fts_au",
+    "DROP TABLE notes_fts",
+]
+
+# bm25() takes a weight for every column, the unindexed note_id included
+SQLITE_NOTE_RANK = "-bm25(notes_fts, 0.0, 2.0, 1.0)"
+SQLITE_NOTE_SNIPPET = "snippet(notes_fts, 2, '<mark>', '</mark>', '…', 16)"
+PG_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8, MaxFragments=2"
+
+notes_fts = table("notes_fts", column("note_id", Uuid), column("title"), column("content"))
+note_search = table("note_search", column("note_id", Uuid), column("document"))
+INDEX_BATCH_SIZE = 500
+
+
+def install(engine):
+    """Creates the full-text indexes for the engine's dialect; safe to call on every start."""
+    with engine.begin() as conn:
+        has_notes = inspect(conn).has_table("notes")
+        if conn.dialect.name == "postgresql":
+            for ddl in PG_DDL + (PG_NOTE_DDL if has_notes else []):
+                conn.execute(text(ddl))
+        elif conn.dialect.name == "sqlite":
+            _install_sqlite(conn, "tenders_fts", SQLITE_DDL)
+            if has_notes:
+                if _legacy_notes_fts(conn):
+                    for ddl in SQLITE_NOTE_LEGACY_DROP:
+                        conn.execute(text(ddl))
+                _install_sqlite(conn, "notes_fts", SQLITE_NOTE_DDL)
+        if has_notes and conn.dialect.name in ("postgresql", "sqlite"):
+            index_missing_notes(conn)
+
+
+def _install_sqlite(conn, name, statements):
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+    ).first()
+    if not exists:
+        for ddl in statements:
+            conn.execute(text(ddl))
+
+
+def _legacy_notes_fts(conn) -> bool:
+    columns = set(conn.execute(text("SELECT name FROM pragma_table_info('notes_fts')")).scalars())
+    insert_trigger = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'notes_fts_ai'")
+    ).first()
+    return bool(columns) and ("note_id" not in columns or insert_trigger is not None)
+
+
+def _dialect_name(db) -> str:
+    # Called with a Session from the routers and a Connection from install()
+    return db.get_bind().dialect.name if hasattr(db, "get_bind") else db.dialect.name
+
+
+def index_notes(db, notes):
+    """
+    Adds (id, title, full body) notes to the full-text index, in the caller's
+    transaction so a note and its index entry commit together.
+    """
+    rows = [{"note_id": note_id, "title": title, "content": body} for note_id, title, body in notes]
+    if not rows:
+        return
+    dialect = _dialect_name(db)
+    if dialect == "postgresql":
+        document = func.to_tsvector(literal_column("'english'"),
+                                    func.concat_ws(" ", bindparam("title"), bindparam("content")))
+        db.execute(insert(note_search).values(note_id=bindparam("id"), document=document),
+                   [{"id": row["note_id"], "title": row["title"], "content": row["content"]}
+                    for row in rows])
+    elif dialect == "sqlite":
+        db.execute(insert(notes_fts), rows)
+
+
+def index_missing_notes(db) -> int:
+    """Indexes notes written before the index existed, decompressing large bodies."""
+    Note = models.Note
+    indexed = notes_fts if _dialect_name(db) == "sqlite" else note_search
+    stmt = (
+        select(Note.id, Note.title, Note.content, Note.content_z)
+        .where(Note.id.not_in(select(indexed.c.note_id)))
+        .limit(INDEX_BATCH_SIZE)
+    )
+    total = 0
+    # Each pass indexes what it read, so the next one starts past it
+    while rows := db.execute(stmt).all():
+        index_notes(db, [(row.id, row.title,
+                          decompress_text(row.content_z) if row.content_z is not None else row.content)
+                         for row in rows])
+        total += len(rows)
+    return total
+
+
+def search_tenders(db, q: str, team_id: int, province: str = None, min_budget: float = None,
+                   max_budget: float = None, limit: int = 20, offset: int = 0):
+    """Returns (Tender, score) pairs ranked and paginated by the database."""
+    Tender = models.Tender
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery(literal_column("'english'"), q)
+        vector = literal_column(PG_TENDER_VECTOR)
+        score = func.ts_rank(literal_column(PG_RANK_WEIGHTS), vector, ts_query).label("score")
+        stmt = select(Tender, score).where(vector.op("@@")(ts_query))
+    elif dialect == "sqlite":
+        match = _fts5_query(q)
+        if not match:
+            return []
+        score = literal_column(SQLITE_RANK).label("score")
+        stmt = (
+            select(Tender, score)
+            .select_from(tenders_fts.join(Tender, Tender.tender_id == tenders_fts.c.rowid))
+            .where(literal_column("tenders_fts").op("MATCH")(match))
+        )
+    else:
+        raise NotImplementedError(f"Full-text search is not available on {dialect}")
+
+    stmt = stmt.where(Tender.team_id == team_id, Tender.deleted_at.is_(None))
+    if province is not None:
+        stmt = stmt.where(Tender.province == province)
+    if min_budget is not None:
+        stmt = stmt.where(Tender.budget >= min_budget)
+    if max_budget is not None:
+        stmt = stmt.where(Tender.budget <= max_budget)
+    stmt = stmt.order_by(score.desc(), Tender.tender_id).limit(limit).offset(offset)
+    return db.execute(stmt).all()
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every token so user input can never be parsed as FTS5 syntax.
+    return " ".join('"%s"' % token.replace('"', '""') for token in tokenize(q))
+
+
+def search_notes(db, workspace_id, q: str, limit: int = 20, after: tuple = None):
+    """
+    Notes of a workspace matching q, best first, as (id, title, updated_at,
+    score, snippet) rows; `after` is the (score, id) of the previous page's
+    last row. Snippets mark matches with <mark> and are only built for the
+    rows of the page on PostgreSQL.
+    """
+    stmt = search_notes_statement(db.get_bind().dialect.name, workspace_id, q, limit, after)
+    if stmt is None:
+        return []
+    return db.execute(stmt).all()
+
+
+def search_notes_statement(dialect: str, workspace_id, q: str, limit: int = 20, after: tuple = None):
+    """search_notes()'s statement; None when q has nothing to match on SQLite."""
+    Note = models.Note
+    if dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery(literal_column("'english'"), q)
+        vector = note_search.c.document
+        # ts_rank is a real; as float8 the cursor's score compares equal to it again
+        ranked = (
+            select(Note.id, Note.title, Note.content, Note.updated_at,
+                   cast(func.ts_rank(vector, ts_query), Float(53)).label("score"))
+            .select_from(note_search.join(Note.__table__, Note.id == note_search.c.note_id))
+            .where(Note.workspace_id == workspace_id, vector.op("@@")(ts_query))
+            .subquery("ranked")
+        )
+        page = _note_page(ranked, limit, after).subquery("page")
+        # Built from notes.content, so a compressed note's snippet comes from its excerpt
+        headline = func.ts_headline(literal_column("'english'"), page.c.content, ts_query,
+                                    PG_HEADLINE_OPTIONS)
+        stmt = (
+            select(page.c.id, page.c.title, page.c.updated_at, page.c.score,
+                   headline.label("snippet"))
+            .order_by(page.c.score.desc(), page.c.id)
+        )
+    elif dialect == "sqlite":
+        match = _fts5_query(q)
+        if not match:
+            return None
+        ranked = (
+            select(Note.id, Note.title, Note.updated_at,
+                   literal_column(SQLITE_NOTE_RANK).label("score"),
+                   literal_column(SQLITE_NOTE_SNIPPET).label("snippet"))
+            .select_from(notes_fts.join(Note.__table__, Note.id == notes_fts.c.note_id))
+            .where(literal_column("notes_fts").op("MATCH")(match), Note.workspace_id == workspace_id)
+            .subquery("ranked")
+        )
+        stmt = _note_page(ranked, limit, after)
+    else:
+        raise NotImplementedError(f"Full-text search is not available on {dialect}")
+    return stmt
+
+
+def _note_page(ranked, limit, after):
+    stmt = select(ranked).order_by(ranked.c.score.desc(), ranked.c.id).limit(limit + 1)
+    if after is not None:
+        score, note_id = after
+        stmt = stmt.where(or_(ranked.c.score < score,
+                              and_(ranked.c.score == score, ranked.c.id > note_id)))
+    return stmt
@@ -0,0 +1,163 @@
+"""
+Idempotency-Key support for tender creation.
+
+The first request with a key reserves it, runs, and stores its response
+for IDEMPOTENCY_TTL_SECONDS. A retry with the same key gets the stored
+response back after one store lookup, without touching the database. A
+retry that arrives while the first is still running gets 409, and reusing
+a key for a different request body gets 422.
+
+Responses are kept in Redis when IDEMPOTENCY_REDIS_URL is set, so every
+worker sees every key; otherwise in this process only, which is only safe
+with a single worker (check_deployment() warns at startup otherwise).
+
+A reservation expires after PENDING_TTL_SECONDS so a crashed request frees
+its key, and is extended for as long as the handler is still running.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from core.settings import settings
+
+from .serialization import dumps
+
+try:
+    import redis
+except ImportError:  # only needed when IDEMPOTENCY_REDIS_URL is set
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# A reservation outlives a crashed request by at most this long
+PENDING_TTL_SECONDS = 60
+# A running handler renews its reservation this often
+PENDING_RENEW_SECONDS = PENDING_TTL_SECONDS / 3
+PENDING = "pending"
+
+
+class MemoryIdempotencyStore:
+    def __init__(self):
+        self._records = {}  # key -> (expires, record)
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, record: dict, ttl: int):
+        """Stores record unless the key is taken; returns the existing record if it is."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._records.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+            if len(self._records) > 10000:
+                self._records = {k: e for k, e in self._records.items() if e[0] > now}
+            self._records[key] = (now + ttl, record)
+            return None
+
+    def complete(self, key: str, record: dict, ttl: int):
+        with self._lock:
+            self._records[key] = (time.monotonic() + ttl, record)
+
+    def extend(self, key: str, ttl: int):
+        with self._lock:
+            entry = self._records.get(key)
+            if entry is not None:
+                self._records[key] = (time.monotonic() + ttl, entry[1])
+
+    def release(self, key: str):
+        with self._lock:
+            self._records.pop(key, None)
+
+
+class RedisIdempotencyStore:
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("IDEMPOTENCY_REDIS_URL is set but the redis package is not installed")
+        self.client = redis.Redis.from_url(url)
+
+    def reserve(self, key: str, record: dict, ttl: int):
+        if self.client.set(key, json.dumps(record), nx=True, ex=ttl):
+            return None
+        existing = self.client.get(key)
+        # Expired between SET and GET: treat it as still in flight
+        return json.loads(existing) if existing else dict(record, status=PENDING)
+
+    def complete(self, key: str, record: dict, ttl: int):
+        self.client.set(key, json.dumps(record), ex=ttl)
+
+    def extend(self, key: str, ttl: int):
+        self.client.expire(key, ttl)
+
+    def release(self, key: str):
+        self.client.delete(key)
+
+
+_store = None
+
+def get_store():
+    global _store
+    if _store is None:
+        if settings.IDEMPOTENCY_REDIS_URL:
+            _store = RedisIdempotencyStore(settings.IDEMPOTENCY_REDIS_URL)
+        else:
+            _store = MemoryIdempotencyStore()
+    return _store
+
+
+def check_deployment(workers: int):
+    """Warns when several workers would each keep their own in-memory keys."""
+    if workers > 1 and not settings.IDEMPOTENCY_REDIS_URL:
+        logger.warning(
+            "%d workers share no Idempotency-Key store: a retry routed to another worker "
+            "runs again. Set IDEMPOTENCY_REDIS_URL.", workers,
+        )
+
+
+def _keep_reserved(store, store_key: str, done: threading.Event):
+    while not done.wait(PENDING_RENEW_SECONDS):
+        store.extend(store_key, PENDING_TTL_SECONDS)
+
+
+def fingerprint(payload) -> str:
+    return hashlib.sha256(dumps(payload)).hexdigest()
+
+
+def run_once(scope: str, key: str, request_fingerprint: str, handler, status_code: int = 200):
+    """
+    Runs handler() once per (scope, key) and returns its payload as a JSON
+    response; replays return the stored response instead.
+    """
+    store = get_store()
+    store_key = f"idempotency:{scope}:{key}"
+    stored = store.reserve(store_key, {"fingerprint": request_fingerprint, "status": PENDING},
+                           PENDING_TTL_SECONDS)
+    if stored is not None:
+        if stored["fingerprint"] != request_fingerprint:
+            raise HTTPException(status_code=422,
+                                detail="Idempotency-Key was already used for a different request")
+        if stored["status"] == PENDING:
+            raise HTTPException(status_code=409,
+                                detail="A request with this Idempotency-Key is still in progress")
+        return Response(stored["body"], status_code=stored["status"], media_type="application/json",
+                        headers={"Idempotent-Replayed": "true"})
+
+    done = threading.Event()
+    renewer = threading.Thread(target=_keep_reserved, args=(store, store_key, done),
+                               name=f"idempotency-renew:{key}", daemon=True)
+    renewer.start()
+    try:
+        body = dumps(handler())
+    except BaseException:
+        store.release(store_key)
+        raise
+    finally:
+        done.set()
+        # Joined so a last renewal cannot shorten the TTL of the completed record
+        renewer.join()
+    store.complete(store_key, {"fingerprint": request_fingerprint, "status": status_code,
+                               "body": body.decode()}, settings.IDEMPOTENCY_TTL_SECONDS)
+    return Response(body, status_code=status_code, media_type="application/json")
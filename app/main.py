@@ -1,10 +1,44 @@
 from fastapi import FastAPI
-from app.routers import tenders
-from app.database import Base, engine
+from app import async_crud, fulltext, idempotency, readiness
+from app.routers import health, metrics, tenders, workspaces
+from app.database import Base, SessionLocal, engine, warm_async_pools
+from app.deadline_index import closing_soon_index
+from app.search_index import tender_index
+from core.settings import settings
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+fulltext.install(engine)
 
 app = FastAPI(title="Tender Insight Hub - Phase 2")
 
 app.include_router(tenders.router)
+app.include_router(workspaces.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
+
+# Reported not ready by GET /ready until the startup events below have run
+readiness.mark_ready("in_process_indexes", False)
+readiness.mark_ready("async_pools", False)
+
+
+@app.on_event("startup")
+def check_deployment():
+    idempotency.check_deployment(settings.WORKERS)
+
+
+@app.on_event("startup")
+def load_in_process_indexes():
+    db = SessionLocal()
+    try:
+        tender_index.load(db)
+        closing_soon_index.load(db)
+    finally:
+        db.close()
+    readiness.mark_ready("in_process_indexes")
+
+
+@app.on_event("startup")
+async def warm_database_pools():
+    await warm_async_pools(async_crud.hot_statements())
+    readiness.mark_ready("async_pools")
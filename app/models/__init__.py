@@ -0,0 +1,40 @@
+from sqlalchemy import BigInteger, Column, Integer, String, Date, DateTime, Float, ForeignKey, Index, Sequence
+from ..database import Base
+
+# The fields a tender exposes through the API, in response column order
+TENDER_FIELDS = ("tender_id", "team_id", "title", "description", "deadline", "province", "buyer", "budget")
+
+# Numbers every tender insert, update and soft delete for the change feed.
+# crud.change_seq_value() fills it, from this sequence on PostgreSQL.
+TENDER_CHANGE_SEQ = Sequence("tenders_change_seq")
+
+class Tender(Base):
+    __tablename__ = "tenders"
+    __table_args__ = (
+        # Keyset pagination and filtered listing (crud.get_tenders_page); every
+        # index ends in tender_id so it also covers the keyset tie-breaker.
+        Index("ix_tenders_team_deadline", "team_id", "deadline", "tender_id"),
+        Index("ix_tenders_team_province_deadline", "team_id", "province", "deadline", "tender_id"),
+        Index("ix_tenders_team_buyer_deadline", "team_id", "buyer", "deadline", "tender_id"),
+        Index("ix_tenders_team_budget", "team_id", "budget", "tender_id"),
+        # Change feed (crud.get_tender_changes): keyset range per team
+        Index("ix_tenders_team_change_seq", "team_id", "change_seq"),
+        # Export (crud.iter_tender_batches) streams a team in tender_id order
+        Index("ix_tenders_team_tender", "team_id", "tender_id"),
+    )
+
+    tender_id = Column(Integer, primary_key=True, index=True)
+    team_id = Column(Integer, index=True)  # For multi-tenant access
+    title = Column(String, nullable=False)
+    description = Column(String)
+    deadline = Column(Date, index=True)  # Rebuilding the closing-soon buckets
+    province = Column(String)
+    buyer = Column(String)
+    budget = Column(Float)
+    change_seq = Column(BigInteger, TENDER_CHANGE_SEQ, nullable=False, index=True)
+    # Set instead of deleting the row, so the change feed can report the delete
+    deleted_at = Column(DateTime)
+
+# The workspace models live in their own modules; re-exported so callers use models.<Name>
+from .user import User  # noqa: E402
+from .workspace import Note, ProjectLink, Workspace, WorkspaceMember, WorkspaceRole  # noqa: E402
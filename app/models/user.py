@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime, Uuid
+import uuid
+from datetime import datetime
+
+from app.database import Base
+
+
+class User(Base):
+    """Accounts referenced as workspace members and as authors of notes and links."""
+
+    __tablename__ = "users"
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    email = Column(String(255), unique=True, nullable=False)
+    full_name = Column(String(200))
+    created_at = Column(DateTime, default=datetime.utcnow)
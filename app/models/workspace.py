@@ -1,10 +1,10 @@
-from sqlalchemy import Column, String, Text, Enum, ForeignKey, DateTime
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, Enum, ForeignKey, DateTime, Index, LargeBinary, Uuid
+from sqlalchemy.orm import column_property, deferred, relationship
 import uuid
 import enum
 from datetime import datetime
 
+from app.compression import decompress_text
 from app.database import Base
 
 
@@ -16,11 +16,15 @@ class WorkspaceRole(enum.Enum):
 
 class Workspace(Base):
     __tablename__ = "workspaces"
+    __table_args__ = (
+        # Keyset order of the workspace listing
+        Index("ix_workspaces_created_id", "created_at", "id"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     name = Column(String(100), nullable=False)
     description = Column(Text, nullable=True)
-    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    created_by = Column(Uuid, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -31,10 +35,14 @@ class Workspace(Base):
 
 class WorkspaceMember(Base):
     __tablename__ = "workspace_members"
-
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    workspace_id = Column(UUID(as_uuid=True), ForeignKey("workspaces.id"))
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    __table_args__ = (
+        # Membership-scoped workspace listing starts from the user's rows
+        Index("ix_workspace_members_user_workspace", "user_id", "workspace_id"),
+    )
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    workspace_id = Column(Uuid, ForeignKey("workspaces.id"))
+    user_id = Column(Uuid, ForeignKey("users.id"))
     role = Column(Enum(WorkspaceRole), default=WorkspaceRole.viewer)
 
     workspace = relationship("Workspace", back_populates="members")
@@ -43,24 +51,41 @@ class WorkspaceMember(Base):
 class Note(Base):
     __tablename__ = "notes"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    workspace_id = Column(UUID(as_uuid=True), ForeignKey("workspaces.id"))
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    # Named like PostgreSQL's default; the router maps a violation of it to 404
+    workspace_id = Column(Uuid, ForeignKey("workspaces.id", name="notes_workspace_id_fkey"), index=True)
     title = Column(String(200))
+    # The whole body, or only its excerpt when content_z holds the compressed body
     content = Column(Text)
-    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    content_z = deferred(Column(LargeBinary))
+    created_by = Column(Uuid, ForeignKey("users.id"))
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Loaded with the row, so uncompressed notes never fetch content_z
+    is_compressed = column_property(content_z.expression.isnot(None))
+
     workspace = relationship("Workspace", back_populates="notes")
 
+    @property
+    def full_content(self):
+        """The complete body; loads and decompresses content_z on first use."""
+        return decompress_text(self.content_z) if self.is_compressed else self.content
+
+    @property
+    def content_truncated(self):
+        """True when content holds only the excerpt of a compressed body."""
+        return self.is_compressed
+
 
 class ProjectLink(Base):
     __tablename__ = "project_links"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    workspace_id = Column(UUID(as_uuid=True), ForeignKey("workspaces.id"))
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    workspace_id = Column(Uuid, ForeignKey("workspaces.id", name="project_links_workspace_id_fkey"),
+                          index=True)
     link_type = Column(String(20))  # tender, url, document
     reference = Column(Text)
-    added_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    added_by = Column(Uuid, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
 
     workspace = relationship("Workspace", back_populates="links")
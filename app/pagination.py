@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional
+from uuid import UUID
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(key: dict, direction: str = "next") -> str:
+    """Packs a keyset position into an opaque, URL-safe cursor string."""
+    payload = {"k": {name: _encode_value(value) for name, value in key.items()}, "d": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Returns (key, direction) for a cursor produced by encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        key = {name: _decode_value(value) for name, value in payload["k"].items()}
+        direction = payload["d"]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if direction not in ("next", "prev"):
+        raise InvalidCursor("Malformed cursor")
+    return key, direction
+
+
+def _encode_value(value) -> Optional[dict]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"date": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"uuid": str(value)}
+    return {"v": value}
+
+
+def _decode_value(value):
+    if value is None:
+        return None
+    if "datetime" in value:
+        return datetime.fromisoformat(value["datetime"])
+    if "date" in value:
+        return date.fromisoformat(value["date"])
+    if "uuid" in value:
+        return UUID(value["uuid"])
+    return value["v"]
@@ -0,0 +1,168 @@
+"""
+Connection pool telemetry: checkout-wait histogram, in-use and overflow
+gauges, timeout/overflow/recycle/invalidation counters and connection age,
+collected from pool events and served by GET /metrics/pool.
+"""
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds of the checkout-wait buckets, in milliseconds
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+pool_metrics = {}  # name -> PoolMetrics, for every instrumented engine
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self.wait_buckets = [0] * len(WAIT_BUCKETS_MS)
+        self.wait_count = 0
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.overflow_connects = 0
+        self.closes = 0
+        self.recycles = 0
+        self.invalidations = 0
+        self._born = {}  # id(connection record) -> wall-clock connect time
+        # Records closed past their recycle age; a recycle is one that reconnects
+        # straight away, as opposed to an old connection closed by dispose()
+        self._aged = {}
+        self._lock = threading.Lock()
+
+    def attach(self, engine):
+        """Instruments engine.pool; waits are timed when it is an instrumented pool class."""
+        pool = engine.pool
+        self.pool = pool
+        pool.metrics = self
+        pool_metrics[self.name] = self
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "close", self._on_close)
+        event.listen(pool, "close_detached", self._on_close_detached)
+        event.listen(pool, "invalidate", self._on_invalidate)
+        event.listen(pool, "soft_invalidate", self._on_invalidate)
+        return self
+
+    def observe_wait(self, seconds: float):
+        ms = seconds * 1000
+        with self._lock:
+            self.wait_count += 1
+            self.wait_sum_ms += ms
+            self.wait_max_ms = max(self.wait_max_ms, ms)
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if ms <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+
+    def observe_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def _on_connect(self, dbapi_connection, record):
+        with self._lock:
+            self.connects += 1
+            if self._aged.pop(id(record), None) is record:
+                self.recycles += 1
+            elif self.pool is not None and self.pool.overflow() > 0:
+                self.overflow_connects += 1
+            self._born[id(record)] = time.time()
+
+    def _on_checkout(self, dbapi_connection, record, proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_close(self, dbapi_connection, record):
+        recycle = self.pool._recycle if self.pool is not None else -1
+        with self._lock:
+            self.closes += 1
+            self._born.pop(id(record), None)
+            if recycle > -1 and time.time() - record.starttime > recycle:
+                if len(self._aged) > 1000:
+                    self._aged.clear()
+                self._aged[id(record)] = record
+
+    def _on_close_detached(self, dbapi_connection):
+        with self._lock:
+            self.closes += 1
+
+    def _on_invalidate(self, dbapi_connection, record, exception):
+        with self._lock:
+            self.invalidations += 1
+            self._born.pop(id(record), None)
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        now = time.time()
+        with self._lock:
+            ages = [now - born for born in self._born.values()]
+            cumulative, buckets = 0, {}
+            for bound, count in zip(WAIT_BUCKETS_MS, self.wait_buckets):
+                cumulative += count
+                buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+            return {
+                "pool_class": type(pool).__name__ if pool is not None else None,
+                "size": pool.size() if pool is not None else None,
+                "checked_in": pool.checkedin() if pool is not None else None,
+                "in_use": pool.checkedout() if pool is not None else None,
+                "overflow": max(pool.overflow(), 0) if pool is not None else None,
+                "checkouts": self.checkouts,
+                "checkout_wait_ms": {
+                    "count": self.wait_count,
+                    "sum": round(self.wait_sum_ms, 3),
+                    "max": round(self.wait_max_ms, 3),
+                    "buckets": buckets,
+                },
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "overflow_connects": self.overflow_connects,
+                "closes": self.closes,
+                "recycles": self.recycles,
+                "invalidations": self.invalidations,
+                "connection_age_seconds": {
+                    "count": len(ages),
+                    "max": round(max(ages), 3) if ages else None,
+                    "avg": round(sum(ages) / len(ages), 3) if ages else None,
+                },
+            }
+
+
+class _TimedCheckout:
+    """Times how long a checkout waited for a free connection (or a new one)."""
+
+    metrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.observe_timeout()
+            raise
+        if self.metrics is not None:
+            self.metrics.observe_wait(time.perf_counter() - started)
+        return record
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep reporting into the same metrics
+        pool = super().recreate()
+        if self.metrics is not None:
+            self.metrics.pool = pool
+            pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
@@ -0,0 +1,45 @@
+"""
+Readiness of the components a worker needs warm before it takes traffic,
+served by GET /ready. Each component registers a check that turns true once
+its pool is open and its hot statements prepared (or, for the in-process
+indexes, once they are loaded); GET /health only reports that the process
+is up.
+"""
+import asyncio
+
+readiness_checks = {}  # name -> callable, True once that component is warm
+
+
+def register(name: str, check):
+    readiness_checks[name] = check
+
+
+def mark_ready(name: str, ready: bool = True):
+    register(name, lambda: ready)
+
+
+def report() -> dict:
+    return {name: bool(check()) for name, check in readiness_checks.items()}
+
+
+async def warm_pool(engine, size: int, statements):
+    """
+    Opens `size` connections of an AsyncEngine concurrently and runs
+    `statements` ((statement, params) pairs) on each, so asyncpg has them
+    prepared and no request pays for connection setup.
+    """
+    barrier = asyncio.Barrier(size)
+
+    async def warm_connection():
+        try:
+            async with engine.connect() as conn:
+                # Hold each connection until all are open, or the pool would reuse one
+                await barrier.wait()
+                for stmt, params in statements:
+                    await conn.execute(stmt, params)
+                await conn.rollback()
+        except BaseException:
+            await barrier.abort()
+            raise
+
+    await asyncio.gather(*(warm_connection() for _ in range(size)))
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from .. import readiness
+
+router = APIRouter(tags=["health"])
+
+@router.get("/health")
+def health():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@router.get("/ready")
+def ready():
+    """Readiness: 503 until every registered component is warm, so deploys hold traffic until then."""
+    components = readiness.report()
+    if not all(components.values()):
+        return JSONResponse(status_code=503, content={"status": "starting", "components": components})
+    return {"status": "ready", "components": components}
@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+
+from .. import database
+from ..pool_metrics import pool_metrics
+from ..single_flight import coalescers
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("/replicas")
+def replica_status():
+    return {
+        "replicas": database.replica_lag(),
+        "pinned_clients": len(database.replica_pins),
+        "pin_seconds": database.replica_pins.seconds,
+    }
+
+@router.get("/pool")
+def pool_status():
+    """Checkout waits, in-use/overflow gauges and recycle counts per connection pool."""
+    return {"pools": {name: metrics.snapshot() for name, metrics in pool_metrics.items()}}
+
+@router.get("/coalescing")
+def coalescing_status():
+    """Per-route single-flight counters and the share of requests that shared a query."""
+    return {"routes": {name: flight.snapshot() for name, flight in coalescers.items()}}
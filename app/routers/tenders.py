@@ -1,26 +1,232 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+import csv
+import io
+import json
 
-from .. import crud, models, schemas, database
+from .. import async_crud, crud, idempotency, models, schemas, database
+from ..etags import Representation, etag_matches, make_etag, not_modified
+from ..pagination import InvalidCursor
+from ..serialization import FastJSONResponse, dumps, rows_to_dicts
+from ..single_flight import tender_lists, tender_reads
 
 router = APIRouter(prefix="/tenders", tags=["tenders"])
 get_db = database.get_db
+get_async_db = database.get_async_db
+
+IDEMPOTENCY_KEY = Header(None, max_length=255, description="Retries with the same key replay the first response")
 
 @router.post("/", response_model=schemas.TenderOut)
-def create_tender(tender: schemas.TenderCreate, db: Session = Depends(get_db)):
-    return crud.create_tender(db, tender)
+def create_tender(
+    tender: schemas.TenderCreate,
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY,
+    db: Session = Depends(get_db),
+):
+    if idempotency_key is None:
+        return crud.create_tender(db, tender)
+
+    def create():
+        db_tender = crud.create_tender(db, tender)
+        return {name: getattr(db_tender, name) for name in crud.TENDER_FIELDS}
+
+    return idempotency.run_once("tenders:create", idempotency_key,
+                                idempotency.fingerprint(tender.dict()), create)
+
+@router.post("/bulk", response_model=schemas.TenderBulkResult)
+async def bulk_create_tenders(
+    request: Request,
+    chunk_size: int = Query(crud.BULK_CHUNK_SIZE, ge=1, le=5000),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY,
+    db: Session = Depends(get_db),
+):
+    """Accepts a JSON array or an NDJSON body (application/x-ndjson) of tenders."""
+    body = await request.body()
+    try:
+        records = _parse_bulk_body(body, request.headers.get("content-type", ""))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if idempotency_key is None:
+        return await run_in_threadpool(crud.bulk_create_tenders, db, records, chunk_size)
+    return await run_in_threadpool(
+        idempotency.run_once, "tenders:bulk", idempotency_key,
+        idempotency.fingerprint([records, chunk_size]),
+        lambda: crud.bulk_create_tenders(db, records, chunk_size),
+    )
+
+def _parse_bulk_body(body: bytes, content_type: str) -> list:
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        records = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Kept as the raw line so it is reported as an invalid row
+                records.append(line.decode(errors="replace"))
+        return records
+    records = json.loads(body)
+    if not isinstance(records, list):
+        raise ValueError("Expected a JSON array")
+    return records
+
+@router.get("/", response_model=schemas.TenderPage)
+def list_tenders(
+    team_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = Query("deadline", pattern="^-?(deadline|budget)$"),
+    filters: schemas.TenderFilters = Depends(),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of tender fields"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    selected = _parse_fields(fields)
+    request = (limit, cursor, sort, selected, tuple(sorted(filters.dict(exclude_none=True).items())))
+
+    def load():
+        page, version = crud.get_tenders_page_with_version(db, team_id, limit, cursor, filters,
+                                                           sort, selected)
+        # response_model documents the shape; the rows bypass per-item validation.
+        page["items"] = rows_to_dicts(selected, page["items"])
+        return Representation(make_etag("list", team_id, *request, version), page)
+
+    # Identical concurrent requests share one query and one serialized body; sessions
+    # pinned to the primary only share with each other, so they read their writes.
+    try:
+        page = tender_lists.call((team_id, request, db.reads_from_primary()), load)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if etag_matches(if_none_match, page.etag):
+        return not_modified(page.etag)
+    return Response(page.body, media_type="application/json", headers={"ETag": page.etag})
+
+def _parse_fields(fields: Optional[str]) -> tuple:
+    try:
+        return crud.parse_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
-@router.get("/", response_model=List[schemas.TenderOut])
-def list_tenders(team_id: int, db: Session = Depends(get_db)):
-    return crud.get_tenders(db, team_id)
+@router.get("/search", response_model=List[schemas.TenderSearchHit])
+def search_tenders(
+    q: str = Query(..., min_length=1),
+    team_id: int = Query(...),
+    province: Optional[str] = None,
+    min_budget: Optional[float] = None,
+    max_budget: Optional[float] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    db: Session = Depends(get_db),
+):
+    return crud.search_tenders(db, q, team_id, province, min_budget, max_budget, limit, offset)
+
+@router.get("/facets", response_model=schemas.TenderFacets)
+def tender_facets(
+    team_id: int,
+    filters: schemas.TenderFilters = Depends(),
+    facet_limit: int = Query(20, ge=1, le=200, description="Values returned per facet"),
+    db: Session = Depends(get_db),
+):
+    """Counts by province, buyer and budget band for the tenders matching the filters."""
+    facets = crud.get_tender_facets(db, team_id, filters)
+    return {name: values[:facet_limit] if isinstance(values, list) else values
+            for name, values in facets.items()}
+
+@router.get("/closing-soon", response_model=List[schemas.TenderOut])
+def closing_soon(
+    team_id: int,
+    days: int = Query(7, ge=0, le=365),
+    db: Session = Depends(get_db),
+):
+    """Tenders due from today through today + days, soonest deadline first."""
+    rows = crud.get_closing_soon(db, team_id, days)
+    return FastJSONResponse(rows_to_dicts(crud.TENDER_FIELDS, rows))
+
+@router.get("/changes", response_model=schemas.TenderChangePage)
+def tender_changes(
+    team_id: int,
+    since: int = Query(0, ge=0, description="next_since of the previous page; 0 for everything"),
+    limit: int = Query(crud.CHANGES_PAGE_SIZE, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    """Tenders inserted, updated or deleted after change `since`, oldest first."""
+    page = crud.get_tender_changes(db, team_id, since, limit)
+    changes = []
+    for row in page["changes"]:
+        change = {"change_seq": row.change_seq, "tender_id": row.tender_id}
+        if row.deleted_at is not None:
+            change.update(deleted=True, tender=None)
+        else:
+            change.update(deleted=False, tender=dict(zip(crud.TENDER_FIELDS, row)))
+        changes.append(change)
+    page["changes"] = changes
+    return FastJSONResponse(page)
+
+@router.get("/export")
+def export_tenders(team_id: int, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """Streams every tender of a team as NDJSON or CSV."""
+    if format == "csv":
+        media_type, filename = "text/csv", f"tenders-team-{team_id}.csv"
+    else:
+        media_type, filename = "application/x-ndjson", f"tenders-team-{team_id}.ndjson"
+    return StreamingResponse(
+        _export_rows(team_id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+def _export_rows(team_id: int, format: str):
+    # The stream outlives the request dependencies, so it owns its session.
+    db = database.SessionLocal()
+    try:
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(crud.TENDER_FIELDS)
+            for batch in crud.iter_tender_batches(db, team_id):
+                writer.writerows(batch)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for batch in crud.iter_tender_batches(db, team_id):
+                yield b"".join(
+                    dumps(item) + b"\n" for item in rows_to_dicts(crud.TENDER_FIELDS, batch)
+                )
+    finally:
+        db.close()
 
 @router.get("/{tender_id}", response_model=schemas.TenderOut)
-def read_tender(tender_id: int, db: Session = Depends(get_db)):
-    db_tender = crud.get_tender(db, tender_id)
-    if not db_tender:
+async def read_tender(
+    tender_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of tender fields"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    selected = _parse_fields(fields)
+
+    async def load():
+        # change_seq rides along as the last column; zip() below leaves it out
+        row = await async_crud.get_tender_fields(db, tender_id, selected + ("change_seq",))
+        if not row:
+            return None
+        return Representation(make_etag("tender", tender_id, row[-1], selected),
+                              dict(zip(selected, row)))
+
+    # Concurrent reads of the same tender share one query and one serialized body,
+    # never between a session pinned to the primary and one reading a replica.
+    tender = await tender_reads.acall((tender_id, selected, db.sync_session.reads_from_primary()),
+                                      load)
+    if tender is None:
         raise HTTPException(status_code=404, detail="Tender not found")
-    return db_tender
+    if etag_matches(if_none_match, tender.etag):
+        return not_modified(tender.etag)
+    return Response(tender.body, media_type="application/json", headers={"ETag": tender.etag})
 
 @router.put("/{tender_id}", response_model=schemas.TenderOut)
 def update_tender(tender_id: int, tender: schemas.TenderUpdate, db: Session = Depends(get_db)):
@@ -1,46 +1,271 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from typing import List, Optional
+from uuid import UUID, uuid4
 
-from app import models, schemas
+from app import fulltext, models, schemas
+from app.compression import note_content
 from app.database import get_db
+from app.pagination import InvalidCursor, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/workspaces", tags=["Workspaces"])
+WORKSPACE_FIELDS = ("id", "name", "description", "created_by", "created_at", "updated_at")
+BULK_CHUNK_SIZE = 1000
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def workspace_fk_name(model) -> str:
+    return f"{model.__tablename__}_workspace_id_fkey"
 
 
 @router.post("/", response_model=schemas.WorkspaceOut)
-def create_workspace(workspace: schemas.WorkspaceCreate, db: Session = Depends(get_db)):
-    new_ws = models.Workspace(name=workspace.name, description=workspace.description)
+def create_workspace(workspace: schemas.WorkspaceCreate, user_id: UUID, db: Session = Depends(get_db)):
+    """Creates the workspace with user_id as its owner, in one transaction."""
+    new_ws = models.Workspace(name=workspace.name, description=workspace.description,
+                              created_by=user_id)
     db.add(new_ws)
-    db.commit()
+    db.add(models.WorkspaceMember(workspace=new_ws, user_id=user_id, role=models.WorkspaceRole.owner))
+    try:
+        db.commit()
+    except IntegrityError:
+        # The users foreign keys are the only constraints a new workspace can violate
+        db.rollback()
+        raise HTTPException(status_code=404, detail="User not found")
     db.refresh(new_ws)
     return new_ws
 
 
-@router.get("/", response_model=list[schemas.WorkspaceOut])
-def list_workspaces(db: Session = Depends(get_db)):
-    return db.query(models.Workspace).all()
+@router.get("/", response_model=schemas.WorkspacePage)
+def list_workspaces(
+    user_id: UUID,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Workspaces the user is a member of, newest first, with member, note
+    and link counts. One statement per page, whatever the page size.
+    """
+    stmt = workspaces_page_statement(user_id, limit)
+    if cursor:
+        try:
+            key, _ = decode_cursor(cursor)
+            stmt = stmt.where(_before(key["created_at"], key["id"]))
+        except (InvalidCursor, KeyError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = db.execute(stmt).all()
+    items = [
+        {**{name: getattr(ws, name) for name in WORKSPACE_FIELDS}, "role": role.value,
+         "member_count": members, "note_count": notes, "link_count": links}
+        for ws, role, members, notes, links in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1][0]
+        next_cursor = encode_cursor({"created_at": last.created_at, "id": last.id})
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _count(model):
+    """Correlated COUNT per listed workspace, served by the workspace_id index."""
+    counted = aliased(model)
+    return (
+        select(func.count())
+        .select_from(counted)
+        .where(counted.workspace_id == models.Workspace.id)
+        .correlate(models.Workspace)
+        .scalar_subquery()
+    )
+
+
+def workspaces_page_statement(user_id: UUID, limit: int):
+    Workspace, Member = models.Workspace, models.WorkspaceMember
+    return (
+        select(
+            Workspace,
+            Member.role,
+            _count(Member).label("member_count"),
+            _count(models.Note).label("note_count"),
+            _count(models.ProjectLink).label("link_count"),
+        )
+        .join(Member, and_(Member.workspace_id == Workspace.id, Member.user_id == user_id))
+        .order_by(Workspace.created_at.desc(), Workspace.id.desc())
+        .limit(limit + 1)
+    )
+
+
+def _before(created_at, workspace_id):
+    Workspace = models.Workspace
+    return or_(
+        Workspace.created_at < created_at,
+        and_(Workspace.created_at == created_at, Workspace.id < workspace_id),
+    )
 
 
 @router.post("/{workspace_id}/notes", response_model=schemas.NoteOut)
 def create_note(workspace_id: UUID, note: schemas.NoteCreate, db: Session = Depends(get_db)):
-    ws = db.query(models.Workspace).filter_by(id=workspace_id).first()
-    if not ws:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    new_note = models.Note(workspace_id=workspace_id, title=note.title, content=note.content)
-    db.add(new_note)
-    db.commit()
-    db.refresh(new_note)
-    return new_note
+    stmt = (
+        insert(models.Note)
+        .values(workspace_id=workspace_id, title=note.title, **note_content(note.content))
+        .returning(*models.Note.__table__.columns)
+    )
+    row = _insert_or_404(db, stmt, models.Note, workspace_id,
+                         then=lambda row: fulltext.index_notes(db, [(row["id"], note.title, note.content)]))
+    return {**row, "content": note.content}
 
 
 @router.post("/{workspace_id}/links", response_model=schemas.ProjectLinkOut)
 def create_link(workspace_id: UUID, link: schemas.ProjectLinkCreate, db: Session = Depends(get_db)):
-    ws = db.query(models.Workspace).filter_by(id=workspace_id).first()
-    if not ws:
+    stmt = (
+        insert(models.ProjectLink)
+        .values(workspace_id=workspace_id, link_type=link.link_type, reference=link.reference)
+        .returning(*models.ProjectLink.__table__.columns)
+    )
+    return _insert_or_404(db, stmt, models.ProjectLink, workspace_id)
+
+
+@router.get("/{workspace_id}/notes", response_model=schemas.NotePage)
+def list_notes(
+    workspace_id: UUID,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    A workspace's notes, most recently updated first. Compressed bodies are
+    listed by their excerpt and flagged content_truncated; GET the note for
+    the whole body.
+    """
+    Note = models.Note
+    stmt = (
+        select(Note)
+        .where(Note.workspace_id == workspace_id)
+        .order_by(Note.updated_at.desc(), Note.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        try:
+            key, _ = decode_cursor(cursor)
+            stmt = stmt.where(or_(Note.updated_at < key["updated_at"],
+                                  and_(Note.updated_at == key["updated_at"], Note.id < key["id"])))
+        except (InvalidCursor, KeyError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    notes = db.execute(stmt).scalars().all()
+    next_cursor = None
+    if len(notes) > limit:
+        last = notes[limit - 1]
+        next_cursor = encode_cursor({"updated_at": last.updated_at, "id": last.id})
+    return {"items": notes[:limit], "next_cursor": next_cursor}
+
+
+@router.get("/{workspace_id}/notes/search", response_model=schemas.NoteSearchPage)
+def search_notes(
+    workspace_id: UUID,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Ranked full-text search over a workspace's notes with highlighted snippets."""
+    after = None
+    if cursor:
+        try:
+            key, _ = decode_cursor(cursor)
+            after = (key["score"], key["id"])
+        except (InvalidCursor, KeyError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = fulltext.search_notes(db, workspace_id, q, limit, after)
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor({"score": last.score, "id": last.id})
+    return {"items": [dict(row._mapping) for row in rows[:limit]], "next_cursor": next_cursor}
+
+
+@router.get("/{workspace_id}/notes/{note_id}", response_model=schemas.NoteOut)
+def get_note(workspace_id: UUID, note_id: UUID, db: Session = Depends(get_db)):
+    note = db.execute(
+        select(models.Note).where(models.Note.id == note_id, models.Note.workspace_id == workspace_id)
+    ).scalar_one_or_none()
+    if note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return {"id": note.id, "title": note.title, "content": note.full_content,
+            "created_by": note.created_by, "updated_at": note.updated_at}
+
+
+@router.post("/{workspace_id}/notes:bulk", response_model=schemas.WorkspaceBulkResult)
+def bulk_create_notes(workspace_id: UUID, notes: List[schemas.NoteCreate],
+                      db: Session = Depends(get_db)):
+    """Imports notes in batched INSERTs within one transaction; all or nothing."""
+    rows = [{"workspace_id": workspace_id, "title": note.title, **note_content(note.content)}
+            for note in notes]
+
+    def index(rows):
+        fulltext.index_notes(db, [(row["id"], note.title, note.content) for row, note in zip(rows, notes)])
+
+    return _bulk_insert_or_404(db, models.Note, rows, workspace_id, then=index)
+
+
+@router.post("/{workspace_id}/links:bulk", response_model=schemas.WorkspaceBulkResult)
+def bulk_create_links(workspace_id: UUID, links: List[schemas.ProjectLinkCreate],
+                      db: Session = Depends(get_db)):
+    """Imports links in batched INSERTs within one transaction; all or nothing."""
+    rows = [{"workspace_id": workspace_id, **link.dict()} for link in links]
+    return _bulk_insert_or_404(db, models.ProjectLink, rows, workspace_id)
+
+
+def _insert_or_404(db: Session, stmt, model, workspace_id: UUID, then=None):
+    """
+    One INSERT ... RETURNING; the workspace_id foreign key stands in for a
+    SELECT of the workspace, so a violation of that key means it does not exist.
+    `then(row)` runs in the same transaction before the commit.
+    """
+    try:
+        row = db.execute(stmt).mappings().one()
+        if then is not None:
+            then(row)
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        _raise_integrity_error(db, exc, model, workspace_id)
+    return dict(row)
+
+
+def _bulk_insert_or_404(db: Session, model, rows: list, workspace_id: UUID, then=None):
+    # Ids are generated here, so the batches need no RETURNING to report them
+    for row in rows:
+        row["id"] = uuid4()
+    try:
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            db.execute(insert(model), rows[start:start + BULK_CHUNK_SIZE])
+        if then is not None:
+            then(rows)
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        _raise_integrity_error(db, exc, model, workspace_id)
+    return {"created": len(rows), "ids": [row["id"] for row in rows]}
+
+
+def _raise_integrity_error(db: Session, exc: IntegrityError, model, workspace_id: UUID):
+    """404 for the workspace_id foreign key, 409 for any other violated constraint."""
+    if _violates_workspace_fk(db, exc, model, workspace_id):
         raise HTTPException(status_code=404, detail="Workspace not found")
-    new_link = models.ProjectLink(workspace_id=workspace_id, link_type=link.link_type, reference=link.reference)
-    db.add(new_link)
-    db.commit()
-    db.refresh(new_link)
-    return new_link
+    raise HTTPException(status_code=409, detail="Conflicts with existing data")
+
+
+def _violates_workspace_fk(db: Session, exc: IntegrityError, model, workspace_id: UUID) -> bool:
+    orig = exc.orig
+    # psycopg2 exposes pgcode/diag, asyncpg sqlstate/constraint_name
+    sqlstate = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if sqlstate is not None:
+        diag = getattr(orig, "diag", orig)
+        return (sqlstate == FOREIGN_KEY_VIOLATION
+                and getattr(diag, "constraint_name", None) == workspace_fk_name(model))
+    # SQLite does not name the violated key; only a missing workspace makes it a 404
+    return "FOREIGN KEY" in str(orig) and db.get(models.Workspace, workspace_id) is None
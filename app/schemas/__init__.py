@@ -0,0 +1,89 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+class TenderBase(BaseModel):
+    title: str
+    description: Optional[str] = None
+    deadline: Optional[date] = None
+    province: Optional[str] = None
+    buyer: Optional[str] = None
+    budget: Optional[float] = None
+
+class TenderCreate(TenderBase):
+    team_id: int  # Required when creating
+
+class TenderUpdate(TenderBase):
+    pass
+
+class TenderOut(TenderBase):
+    tender_id: int
+    team_id: int
+
+    class Config:
+        orm_mode = True
+
+class TenderFilters(BaseModel):
+    province: Optional[str] = None
+    buyer: Optional[str] = None
+    deadline_from: Optional[date] = None
+    deadline_to: Optional[date] = None
+    min_budget: Optional[float] = None
+    max_budget: Optional[float] = None
+
+class TenderPage(BaseModel):
+    items: List[TenderOut]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+class TenderBulkRowResult(BaseModel):
+    index: int
+    status: str  # "created" or "invalid"
+    tender_id: Optional[int] = None
+    errors: Optional[List[dict]] = None
+
+class TenderBulkResult(BaseModel):
+    created: int
+    failed: int
+    results: List[TenderBulkRowResult]
+
+class TenderSearchHit(BaseModel):
+    tender: TenderOut
+    score: float
+
+class FacetCount(BaseModel):
+    value: Optional[str] = None  # None counts tenders without a value
+    count: int
+
+class TenderFacets(BaseModel):
+    total: int
+    province: List[FacetCount]
+    buyer: List[FacetCount]
+    budget_band: List[FacetCount]
+
+class TenderChange(BaseModel):
+    change_seq: int
+    tender_id: int
+    deleted: bool = False
+    tender: Optional[TenderOut] = None  # None when the change is a deletion
+
+class TenderChangePage(BaseModel):
+    changes: List[TenderChange]
+    next_since: int  # Pass as ?since= to fetch the following changes
+    has_more: bool
+
+# Workspace schemas live in schemas/workspace.py; re-exported so routers use schemas.<Name>
+from .workspace import (  # noqa: E402
+    NoteCreate,
+    NoteOut,
+    NotePage,
+    NoteSearchHit,
+    NoteSearchPage,
+    ProjectLinkCreate,
+    ProjectLinkOut,
+    WorkspaceBulkResult,
+    WorkspaceCreate,
+    WorkspaceOut,
+    WorkspacePage,
+    WorkspaceSummary,
+)
@@ -15,13 +15,19 @@ class NoteCreate(NoteBase):
 
 class NoteOut(NoteBase):
     id: UUID
-    created_by: UUID
+    content_truncated: bool = False  # content is only the excerpt of a compressed body
+    created_by: Optional[UUID] = None  # The creator, made its owner; unset on older workspaces
     updated_at: datetime
 
     class Config:
         orm_mode = True
 
 
+class NotePage(BaseModel):
+    items: List[NoteOut]
+    next_cursor: Optional[str] = None
+
+
 class ProjectLinkBase(BaseModel):
     link_type: str
     reference: str
@@ -33,7 +39,7 @@ class ProjectLinkCreate(ProjectLinkBase):
 
 class ProjectLinkOut(ProjectLinkBase):
     id: UUID
-    added_by: UUID
+    added_by: Optional[UUID] = None
     created_at: datetime
 
     class Config:
@@ -51,9 +57,39 @@ class WorkspaceCreate(WorkspaceBase):
 
 class WorkspaceOut(WorkspaceBase):
     id: UUID
-    created_by: UUID
+    created_by: Optional[UUID] = None  # The creator, made its owner; unset on older workspaces
     created_at: datetime
     updated_at: datetime
 
     class Config:
         orm_mode = True
+
+
+class WorkspaceSummary(WorkspaceOut):
+    role: str  # The requesting member's role
+    member_count: int
+    note_count: int
+    link_count: int
+
+
+class WorkspacePage(BaseModel):
+    items: List[WorkspaceSummary]
+    next_cursor: Optional[str] = None
+
+
+class WorkspaceBulkResult(BaseModel):
+    created: int
+    ids: List[UUID]
+
+
+class NoteSearchHit(BaseModel):
+    id: UUID
+    title: Optional[str]
+    snippet: str  # Matches wrapped in <mark></mark>
+    score: float
+    updated_at: Optional[datetime]
+
+
+class NoteSearchPage(BaseModel):
+    items: List[NoteSearchHit]
+    next_cursor: Optional[str] = None
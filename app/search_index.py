@@ -0,0 +1,189 @@
+"""
+In-process inverted index with BM25 ranking for tender keyword search.
+
+The index lives in the API process, so every worker process holds its own
+copy; load() builds it from the database on startup. The crud write paths
+update the copy of the process that wrote, and catch_up() applies the
+change feed so the others trail by at most IN_PROCESS_INDEX_REFRESH_SECONDS.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+from sqlalchemy import select
+
+from core.settings import settings
+
+from . import models
+from .change_feed import ChangeFeedFollower
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to with".split()
+)
+# Title and buyer matches say more about a tender than a hit deep in the description.
+FIELD_WEIGHTS = {"title": 3.0, "buyer": 2.0, "description": 1.0}
+LOAD_BATCH_SIZE = 5000
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+class TenderSearchIndex(ChangeFeedFollower):
+    """Tokenized postings per term with per-document metadata for filtering."""
+
+    columns = ("tender_id", "team_id", "province", "budget", *FIELD_WEIGHTS)
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, enabled: bool = True,
+                 refresh_seconds: float = settings.IN_PROCESS_INDEX_REFRESH_SECONDS):
+        super().__init__(refresh_seconds)
+        self.k1 = k1
+        self.b = b
+        # Disabled when search runs in the database, so writes skip the upkeep.
+        self.enabled = enabled
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._postings = {}  # term -> {tender_id: weighted term frequency}
+        self._doc_terms = {}  # tender_id -> terms, needed to remove a document
+        self._doc_len = {}
+        self._total_len = 0.0
+        self._meta = {}  # tender_id -> (team_id, province, budget)
+        self._by_team = {}  # team_id -> set of tender_ids
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def add(self, tender):
+        """Indexes (or re-indexes) any object exposing the Tender attributes."""
+        if not self.enabled:
+            return
+        weighted = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(getattr(tender, field, None)):
+                weighted[term] += weight
+        doc_len = sum(weighted.values())
+
+        with self._lock:
+            self._remove(tender.tender_id)
+            for term, tf in weighted.items():
+                self._postings.setdefault(term, {})[tender.tender_id] = tf
+            self._doc_terms[tender.tender_id] = tuple(weighted)
+            self._doc_len[tender.tender_id] = doc_len
+            self._total_len += doc_len
+            self._meta[tender.tender_id] = (tender.team_id, tender.province, tender.budget)
+            self._by_team.setdefault(tender.team_id, set()).add(tender.tender_id)
+
+    def remove(self, tender_id: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._remove(tender_id)
+
+    def _remove(self, tender_id):
+        terms = self._doc_terms.pop(tender_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[tender_id]
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(tender_id)
+        team_id = self._meta.pop(tender_id)[0]
+        team_docs = self._by_team[team_id]
+        team_docs.discard(tender_id)
+        if not team_docs:
+            del self._by_team[team_id]
+
+    def clear(self):
+        """Empties the index; the next catch_up() then rebuilds it from the whole feed."""
+        with self._lock:
+            self._reset()
+            self.last_seq = 0
+            self._refreshed_at = float("-inf")
+
+    def _following(self) -> bool:
+        return self.enabled
+
+    def _apply_change(self, row):
+        if row.deleted_at is not None:
+            self.remove(row.tender_id)
+        else:
+            self.add(row)
+
+    def search(self, query: str, team_id=None, province=None, min_budget=None,
+               max_budget=None, limit: int = 20):
+        """Returns up to `limit` (tender_id, score) pairs, best match first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if not terms or not n_docs:
+                return []
+            avg_len = self._total_len / n_docs
+            team_docs = None
+            if team_id is not None:
+                team_docs = self._by_team.get(team_id)
+                if not team_docs:
+                    return []
+
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                # Walk whichever side of the team intersection is shorter.
+                if team_docs is not None and len(team_docs) < df:
+                    matches = ((d, postings[d]) for d in team_docs if d in postings)
+                elif team_docs is not None:
+                    matches = ((d, tf) for d, tf in postings.items() if d in team_docs)
+                else:
+                    matches = postings.items()
+                for doc_id, tf in matches:
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            if province is not None or min_budget is not None or max_budget is not None:
+                scores = {
+                    doc_id: score for doc_id, score in scores.items()
+                    if self._matches(self._meta[doc_id], province, min_budget, max_budget)
+                }
+            return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    @staticmethod
+    def _matches(meta, province, min_budget, max_budget):
+        _, doc_province, budget = meta
+        if province is not None and doc_province != province:
+            return False
+        if min_budget is not None and (budget is None or budget < min_budget):
+            return False
+        if max_budget is not None and (budget is None or budget > max_budget):
+            return False
+        return True
+
+    def load(self, db):
+        """Rebuilds the index from every tender in the database."""
+        if not self.enabled:
+            return
+        columns = [getattr(models.Tender, name) for name in self.columns]
+        stmt = (
+            select(*columns)
+            .where(models.Tender.deleted_at.is_(None))
+            .execution_options(yield_per=LOAD_BATCH_SIZE)
+        )
+        with self._lock:
+            self.clear()
+            self._start_following(db)
+            for row in db.execute(stmt):
+                self.add(row)
+
+
+tender_index = TenderSearchIndex(enabled=settings.SEARCH_BACKEND == "memory")
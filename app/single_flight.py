@@ -0,0 +1,153 @@
+"""
+In-process request coalescing ("single flight") for hot tender reads.
+
+Concurrent calls with the same key share one execution: the first caller
+runs the loader, the rest wait for its result. The result is then reused
+for COALESCE_TTL_SECONDS, so a burst right behind the first one does not
+hit the database either. Writes drop a tender's entries through
+invalidate(), and the short TTL bounds staleness from other workers.
+
+call() is for sync routes (threads), acall() for async routes (one event
+loop); both share the recent-result cache and the metrics.
+"""
+import asyncio
+import threading
+import time
+
+from core.settings import settings
+
+coalescers = {}  # name -> SingleFlight, served by GET /metrics/coalescing
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name: str, ttl: float = 0.5):
+        self.name = name
+        self.ttl = ttl
+        self.requests = 0
+        self.executions = 0
+        self.shared = 0  # joined a call already in flight
+        self.cache_hits = 0  # served from the micro-TTL cache
+        self._recent = {}  # key -> (expires, value)
+        self._calls = {}  # key -> _Call, for threads
+        self._futures = {}  # key -> asyncio.Future, for coroutines
+        self._groups = {}  # key[0] -> keys present in any of the three, for invalidate()
+        self._lock = threading.Lock()
+        coalescers[name] = self
+
+    def _join(self, key, in_flight, start):
+        """Under the lock: returns ("hit", value), ("wait", call) or ("run", call)."""
+        self.requests += 1
+        entry = self._recent.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.cache_hits += 1
+            return "hit", entry[1]
+        call = in_flight.get(key)
+        if call is not None:
+            self.shared += 1
+            return "wait", call
+        self.executions += 1
+        call = in_flight[key] = start()
+        self._groups.setdefault(key[0], set()).add(key)
+        return "run", call
+
+    def _finish(self, key, in_flight, call, value, failed):
+        with self._lock:
+            # An invalidate() while running removed the call; keep its result out
+            if in_flight.get(key) is not call:
+                return
+            del in_flight[key]
+            if not failed and self.ttl > 0:
+                now = time.monotonic()
+                if len(self._recent) > 1000:
+                    self._recent = {k: e for k, e in self._recent.items() if e[0] > now}
+                    self._regroup()
+                self._recent[key] = (now + self.ttl, value)
+            elif key not in self._recent:
+                keys = self._groups.get(key[0])
+                if keys is not None and key not in self._calls and key not in self._futures:
+                    keys.discard(key)
+                    if not keys:
+                        del self._groups[key[0]]
+
+    def _regroup(self):
+        self._groups = {}
+        for entries in (self._recent, self._calls, self._futures):
+            for key in entries:
+                self._groups.setdefault(key[0], set()).add(key)
+
+    def call(self, key, fn):
+        with self._lock:
+            state, call = self._join(key, self._calls, _Call)
+        if state == "hit":
+            return call
+        if state == "wait":
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            self._finish(key, self._calls, call, call.value, call.error is not None)
+            call.done.set()
+        return call.value
+
+    async def acall(self, key, coro_fn):
+        with self._lock:
+            state, future = self._join(key, self._futures, asyncio.get_running_loop().create_future)
+        if state == "hit":
+            return future
+        if state == "wait":
+            # Shielded so a waiter that disconnects does not cancel everyone's call
+            return await asyncio.shield(future)
+        try:
+            value = await coro_fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            self._finish(key, self._futures, future, None, True)
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # retrieved here so an unshared failure is not logged twice
+            self._finish(key, self._futures, future, None, True)
+            raise
+        future.set_result(value)
+        self._finish(key, self._futures, future, value, False)
+        return value
+
+    def invalidate(self, group):
+        """Drops cached and in-flight entries whose key starts with group."""
+        with self._lock:
+            for key in self._groups.pop(group, ()):
+                for entries in (self._recent, self._calls, self._futures):
+                    entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._recent, self._calls, self._futures, self._groups = {}, {}, {}, {}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            requests = self.requests
+            return {
+                "requests": requests,
+                "executions": self.executions,
+                "shared_in_flight": self.shared,
+                "micro_cache_hits": self.cache_hits,
+                # Share of requests that did not run their own query
+                "coalescing_ratio": round(1 - self.executions / requests, 4) if requests else 0.0,
+            }
+
+
+tender_reads = SingleFlight("read_tender", ttl=settings.COALESCE_TTL_SECONDS)
+tender_lists = SingleFlight("list_tenders", ttl=settings.COALESCE_TTL_SECONDS)
@@ -0,0 +1,69 @@
+"""
+Small in-process LRU cache whose entries belong to a team.
+
+Writes bump the team's generation instead of hunting down its entries:
+lookups include the generation in the key, so stale entries stop matching
+at once and age out of the LRU. The TTL bounds how long a worker can serve
+results that predate a write made by another worker process.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalized_key(params: dict) -> str:
+    """Stable hash of a parameter dict; unset (None) values do not count."""
+    payload = json.dumps({k: v for k, v in params.items() if v is not None},
+                         sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class TeamCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (team_id, generation, key) -> (expires, value)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, team_id, key):
+        now = time.monotonic()
+        with self._lock:
+            full_key = (team_id, self._generations.get(team_id, 0), key)
+            entry = self._entries.get(full_key)
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(full_key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, team_id, key, value, generation: int = None):
+        """
+        Stores value; pass the generation read before computing it so a write
+        that landed meanwhile keeps the (already stale) value out.
+        """
+        with self._lock:
+            current = self._generations.get(team_id, 0)
+            if generation is not None and generation != current:
+                return
+            self._entries[(team_id, current, key)] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((team_id, current, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, team_id) -> int:
+        return self._generations.get(team_id, 0)
+
+    def invalidate(self, team_id):
+        with self._lock:
+            self._generations[team_id] = self._generations.get(team_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
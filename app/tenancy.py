@@ -0,0 +1,124 @@
+"""
+Tenant scoping for ORM statements.
+
+A TenantSession that carries a tenant (session.info["tenant_id"], or the
+tenant_id execution option for one statement) adds `tenant_id = :param` for
+every tenant-owned entity in its SELECT, UPDATE and DELETE statements,
+joined and aliased entities included, through with_loader_criteria.
+
+The criteria is a lambda whose tenant_id is a tracked closure variable, so
+it becomes a bound parameter: one compiled statement serves every tenant
+instead of one per tenant. Core statements against Tables get the same
+`tenant_id = :param` for every tenant-owned table they select from (joined
+and aliased tables included) or update or delete; a subquery or CTE over a
+tenant-owned table cannot be scoped from outside and is rejected.
+
+With session.info["row_level_security"] set, PostgreSQL enforces the scoping
+instead: every transaction starts by setting app.tenant_id, the policies from
+rls_policy_ddl() filter the rows, and no criteria is added to statements.
+"""
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session, with_loader_criteria
+from sqlalchemy.sql import Alias, Join, TableClause
+from sqlalchemy.sql.util import find_tables
+
+TENANT_COLUMN = "tenant_id"
+TENANT_SETTING = "app.tenant_id"
+# SET LOCAL takes no bind parameters; set_config(..., true) is the same
+# transaction-scoped setting, so it never outlives the pooled connection's transaction
+SET_TENANT = text(f"SELECT set_config('{TENANT_SETTING}', :tenant_id, true)")
+
+_scoped_classes = {}  # registry -> classes with a tenant_id column
+
+
+class TenantSession(Session):
+    pass
+
+
+def tenant_scoped_classes(registry) -> tuple:
+    classes = _scoped_classes.get(registry)
+    if classes is None or len(registry.mappers) != classes[0]:
+        found = tuple(m.class_ for m in registry.mappers if TENANT_COLUMN in m.columns)
+        classes = _scoped_classes[registry] = (len(registry.mappers), found)
+    return classes[1]
+
+
+def tenant_criteria(registry, tenant_id) -> list:
+    return [
+        with_loader_criteria(cls, lambda cls: cls.tenant_id == tenant_id, include_aliases=True)
+        for cls in tenant_scoped_classes(registry)
+    ]
+
+
+def tenant_conditions(tables, tenant_id) -> list:
+    """`tenant_id = :param` for each distinct tenant-owned table or table alias."""
+    return [table.c[TENANT_COLUMN] == tenant_id
+            for table in dict.fromkeys(tables) if TENANT_COLUMN in table.c]
+
+
+def _from_tables(from_) -> list:
+    if isinstance(from_, Join):
+        return _from_tables(from_.left) + _from_tables(from_.right)
+    if isinstance(from_, TableClause) or (isinstance(from_, Alias) and isinstance(from_.element, TableClause)):
+        return [from_]
+    if any(TENANT_COLUMN in table.c for table in find_tables(from_)):
+        raise ValueError(f"Cannot scope {from_!r} to a tenant; select from the tenant-owned tables directly")
+    return []
+
+
+def scope_core_statement(statement, tenant_id):
+    """Adds the tenant criteria to a Core SELECT, UPDATE or DELETE against Tables."""
+    if statement.is_select:
+        tables = [table for from_ in statement.get_final_froms() for table in _from_tables(from_)]
+    elif statement.is_update or statement.is_delete:
+        # The target plus any table the WHERE clause pulls in (UPDATE ... FROM)
+        tables = [statement.table]
+        if statement.whereclause is not None:
+            tables += find_tables(statement.whereclause, check_columns=True)
+    else:
+        return statement
+    conditions = tenant_conditions(tables, tenant_id)
+    return statement.where(*conditions) if conditions else statement
+
+
+def rls_policy_ddl(registry, dialect) -> list:
+    """ALTER TABLE / CREATE POLICY statements for each tenant-owned table; rerunnable."""
+    statements = []
+    for cls in tenant_scoped_classes(registry):
+        table = cls.__table__.name
+        column_type = cls.__table__.c[TENANT_COLUMN].type.compile(dialect=dialect)
+        # An unset (or reset, '') setting matches no rows rather than failing the cast
+        current = f"NULLIF(current_setting('{TENANT_SETTING}', true), '')::{column_type}"
+        statements += [
+            f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY",
+            # The application role usually owns the tables, and owners skip unforced policies
+            f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY",
+            f"DROP POLICY IF EXISTS tenant_isolation ON {table}",
+            f"CREATE POLICY tenant_isolation ON {table} "
+            f"USING ({TENANT_COLUMN} = {current}) WITH CHECK ({TENANT_COLUMN} = {current})",
+        ]
+    return statements
+
+
+@event.listens_for(TenantSession, "after_begin")
+def _set_tenant_setting(session, transaction, connection):
+    tenant_id = session.info.get("tenant_id")
+    if session.info.get("row_level_security") and tenant_id is not None:
+        connection.execute(SET_TENANT, {"tenant_id": str(tenant_id)})
+
+
+@event.listens_for(TenantSession, "do_orm_execute")
+def _scope_to_tenant(state):
+    if state.session.info.get("row_level_security"):
+        return
+    tenant_id = state.execution_options.get("tenant_id", state.session.info.get("tenant_id"))
+    if tenant_id is None:
+        return
+    if state.bind_mapper is None:
+        state.statement = scope_core_statement(state.statement, tenant_id)
+        return
+    # Lazy and column loads inherit the criteria from the statement that loaded the parent
+    if state.is_column_load or state.is_relationship_load:
+        return
+    if state.is_select or state.is_update or state.is_delete:
+        state.statement = state.statement.options(*tenant_criteria(state.bind_mapper.registry, tenant_id))
@@ -1,9 +1,55 @@
-from pydantic import BaseSettings
-
-class AppConfig(BaseSettings):
-    APP_NAME: str = "Tender Insight Hub"
-    DEBUG: bool = True
-    DATABASE_URL: str = "sqlite:///./test.db"
-
-    class Config:
-        env_file = ".env"
+try:
+    from pydantic_settings import BaseSettings
+except ImportError:  # pydantic 1.x ships BaseSettings itself
+    from pydantic import BaseSettings
+
+class AppConfig(BaseSettings):
+    APP_NAME: str = "Tender Insight Hub"
+    DEBUG: bool = True
+    DATABASE_URL: str = "sqlite:///./test.db"
+    # Comma-separated read replica URLs; reads fall back to the primary when empty
+    DATABASE_REPLICA_URLS: str = ""
+    # How long a client keeps reading from the primary after it wrote
+    DATABASE_REPLICA_PIN_SECONDS: float = 5.0
+    # Comma-separated proxy addresses or CIDRs whose X-Forwarded-For names the
+    # client to pin; without one, only X-Client-Id or the bearer token does
+    TRUSTED_PROXIES: str = ""
+    # "memory" ranks with the in-process BM25 index, "database" uses the
+    # PostgreSQL tsvector / SQLite FTS5 index (app/fulltext.py)
+    SEARCH_BACKEND: str = "memory"
+    # Upper bound on how stale cached facet counts can be when another
+    # worker process wrote to the team (same-process writes invalidate)
+    FACET_CACHE_TTL_SECONDS: float = 30.0
+    # Upper bound on how far the per-process search index and closing-soon
+    # buckets trail writes made by other worker processes (app/change_feed.py)
+    IN_PROCESS_INDEX_REFRESH_SECONDS: float = 5.0
+    # Idempotency-Key responses on tender creation (app/idempotency.py);
+    # kept in Redis when a URL is set, otherwise per process
+    IDEMPOTENCY_REDIS_URL: str = ""
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # Worker processes serving the app (the Dockerfile runs gunicorn with 4);
+    # only used to warn about per-process state that needs sharing
+    WORKERS: int = 1
+    # How long a coalesced tender read is reused after it completes (app/single_flight.py)
+    COALESCE_TTL_SECONDS: float = 0.5
+    # Note bodies at least this large are stored compressed (app/compression.py);
+    # the excerpt stays plain for listings and full-text search
+    NOTE_COMPRESSION_THRESHOLD_BYTES: int = 16384
+    NOTE_EXCERPT_CHARS: int = 2000
+    # Connection pool sizing, shared by the primary, replicas and the async path.
+    # In-memory SQLite keeps its single-connection pool and ignores these.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds a checkout waits for a free connection before TimeoutError
+    DB_POOL_TIMEOUT: float = 30.0
+    # Seconds after which a connection is replaced on checkout; -1 disables
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # How DatabaseManager keeps tenants apart (app/tenancy.py): "filter" adds
+    # tenant_id criteria to ORM statements, "rls" sets app.tenant_id per
+    # transaction and leaves it to PostgreSQL row-level security policies
+    DB_TENANT_ISOLATION: str = "filter"
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
@@ -0,0 +1,110 @@
+"""
+Benchmarks tenant scoping: a tenant_id WHERE clause rebuilt on every call
+(the old DatabaseManager.execute_for_tenant) against the with_loader_criteria
+scoping in app/tenancy.py, over 1,000 tenants.
+
+    python -m scripts.bench_tenant_scoping
+
+Reports the compiled-statement cache hit rate and the time per query, on
+an in-memory SQLite database so the numbers are mostly SQLAlchemy overhead.
+"""
+import time
+
+from sqlalchemy import Column, ForeignKey, Integer, String, create_engine, event, select
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.orm import Session, declarative_base
+
+from app.tenancy import TenantSession
+
+TENANTS = 1000
+ROWS_PER_TENANT = 5
+ROUNDS = 3
+
+Base = declarative_base()
+
+
+class Document(Base):
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(String(36), index=True)
+    title = Column(String(200))
+
+
+class Comment(Base):
+    __tablename__ = "comments"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(String(36), index=True)
+    document_id = Column(ForeignKey("documents.id"))
+    body = Column(String(200))
+
+
+def tenant(i: int) -> str:
+    return f"tenant-{i:04d}"
+
+
+def seed(engine):
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.execute(Document.__table__.insert(), [
+            {"id": t * ROWS_PER_TENANT + n, "tenant_id": tenant(t), "title": f"Document {n}"}
+            for t in range(TENANTS) for n in range(ROWS_PER_TENANT)
+        ])
+        db.execute(Comment.__table__.insert(), [
+            {"id": t * ROWS_PER_TENANT + n, "tenant_id": tenant(t),
+             "document_id": t * ROWS_PER_TENANT + n, "body": "ok"}
+            for t in range(TENANTS) for n in range(ROWS_PER_TENANT)
+        ])
+        db.commit()
+
+
+def per_call_where(db, tenant_id):
+    # Both sides of the join need their own clause, built again on every call
+    stmt = (
+        select(Document.title, Comment.body)
+        .join(Comment, Comment.document_id == Document.id)
+        .where(Document.tenant_id == tenant_id, Comment.tenant_id == tenant_id)
+    )
+    return db.execute(stmt).all()
+
+
+JOINED = select(Document.title, Comment.body).join(Comment, Comment.document_id == Document.id)
+
+
+def loader_criteria(db, tenant_id):
+    return db.execute(JOINED, execution_options={"tenant_id": tenant_id}).all()
+
+
+def bench(label, engine, session_class, query):
+    stats = {CacheStats.CACHE_HIT: 0, CacheStats.CACHE_MISS: 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        stats[context.cache_hit] = stats.get(context.cache_hit, 0) + 1
+
+    engine.clear_compiled_cache()
+    with session_class(engine) as db:
+        started = time.perf_counter()
+        for _ in range(ROUNDS):
+            for t in range(TENANTS):
+                assert len(query(db, tenant(t))) == ROWS_PER_TENANT
+        elapsed = time.perf_counter() - started
+    event.remove(engine, "before_cursor_execute", _count)
+
+    queries = TENANTS * ROUNDS
+    hits = stats[CacheStats.CACHE_HIT]
+    print(f"{label:<28} {hits / queries:>9.2%} {elapsed / queries * 1e6:>12.0f} us")
+
+
+def main():
+    engine = create_engine("sqlite://")
+    seed(engine)
+    print(f"{TENANTS} tenants x {ROUNDS} rounds, joined SELECT")
+    print(f"{'':<28} {'cache hits':>10} {'per query':>15}")
+    bench("per-call WHERE", engine, Session, per_call_where)
+    bench("with_loader_criteria", engine, TenantSession, loader_criteria)
+
+
+if __name__ == "__main__":
+    main()
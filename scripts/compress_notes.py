@@ -0,0 +1,57 @@
+"""
+Backfills compressed storage for note bodies written before it existed.
+
+    python -m scripts.compress_notes [--batch-size 500]
+
+Walks notes in primary-key order, one committed batch at a time, so it can
+be stopped and rerun; rows already compressed or below the threshold are
+left alone.
+"""
+import argparse
+
+from sqlalchemy import func, inspect, select, update
+
+from app import models
+from app.compression import note_content
+from app.database import SessionLocal, engine
+from core.settings import settings
+
+
+def backfill(db, batch_size: int = 500) -> int:
+    Note = models.Note
+    compressed, last_id = 0, None
+    while True:
+        stmt = (
+            select(Note.id, Note.content)
+            # Bodies no longer than the excerpt cannot get smaller
+            .where(Note.content_z.is_(None), func.length(Note.content) > settings.NOTE_EXCERPT_CHARS)
+            .order_by(Note.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            stmt = stmt.where(Note.id > last_id)
+        rows = db.execute(stmt).all()
+        if not rows:
+            return compressed
+        for note_id, content in rows:
+            values = note_content(content)
+            if values["content_z"] is not None:
+                db.execute(update(Note).where(Note.id == note_id).values(**values))
+                compressed += 1
+        db.commit()
+        last_id = rows[-1].id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    if not inspect(engine).has_table("notes"):
+        print("No notes table yet; the app creates it on first start.")
+        return
+    with SessionLocal() as db:
+        print(f"Compressed {backfill(db, args.batch_size)} note bodies.")
+
+
+if __name__ == "__main__":
+    main()
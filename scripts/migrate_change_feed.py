@@ -0,0 +1,82 @@
+"""
+Brings a tenders table created before the change feed up to the model.
+
+    python -m scripts.migrate_change_feed [--batch-size 1000]
+
+create_all() does not alter existing tables, so this adds the change_seq
+and deleted_at columns (and the tenders_change_seq sequence on PostgreSQL),
+numbers the existing rows in tender_id order, one committed batch at a
+time, and then makes change_seq NOT NULL and creates the tender indexes.
+Rerunnable; rows already numbered are left alone. Run it before starting
+the new version of the app.
+"""
+import argparse
+
+from sqlalchemy import func, inspect, select, text, update
+
+from app import models
+from app.database import SessionLocal, engine
+
+
+def add_columns(bind) -> list:
+    """Adds whichever change feed columns the table lacks; returns their names."""
+    existing = {column["name"] for column in inspect(bind).get_columns("tenders")}
+    timestamp = "TIMESTAMP" if bind.dialect.name == "postgresql" else "DATETIME"
+    added = []
+    with bind.begin() as conn:
+        if bind.dialect.name == "postgresql":
+            conn.execute(text("CREATE SEQUENCE IF NOT EXISTS tenders_change_seq"))
+        for name, ddl_type in (("change_seq", "BIGINT"), ("deleted_at", timestamp)):
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE tenders ADD COLUMN {name} {ddl_type}"))
+                added.append(name)
+    return added
+
+
+def backfill(db, batch_size: int = 1000) -> int:
+    """Numbers rows without a change_seq after the highest number in use."""
+    Tender = models.Tender
+    numbered = 0
+    next_seq = db.scalar(select(func.coalesce(func.max(Tender.change_seq), 0))) + 1
+    while True:
+        ids = db.scalars(
+            select(Tender.tender_id)
+            .where(Tender.change_seq.is_(None))
+            .order_by(Tender.tender_id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            return numbered
+        db.execute(update(Tender), [
+            {"tender_id": tender_id, "change_seq": next_seq + i} for i, tender_id in enumerate(ids)
+        ])
+        db.commit()
+        next_seq += len(ids)
+        numbered += len(ids)
+
+
+def finish(bind):
+    """NOT NULL on change_seq (PostgreSQL; SQLite cannot alter it) and the missing indexes."""
+    if bind.dialect.name == "postgresql":
+        with bind.begin() as conn:
+            conn.execute(text("ALTER TABLE tenders ALTER COLUMN change_seq SET NOT NULL"))
+    for index in models.Tender.__table__.indexes:
+        index.create(bind, checkfirst=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    if not inspect(engine).has_table("tenders"):
+        print("No tenders table yet; the app creates it on first start.")
+        return
+    added = add_columns(engine)
+    with SessionLocal() as db:
+        numbered = backfill(db, args.batch_size)
+    finish(engine)
+    print(f"Added {', '.join(added) or 'no'} columns; numbered {numbered} tenders.")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,13 @@ def create_tables():
             closing_date DATE
         )
     """)
+    # Full-text index used by the database search backend (app/fulltext.py)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tenders_search ON tenders
+        USING gin (to_tsvector('english', title || ' ' || coalesce(description, '')))
+    """)
+    # Deadline-ordered index behind the closing-soon view
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tenders_closing_date ON tenders (closing_date)")
     conn.commit()
     conn.close()
 
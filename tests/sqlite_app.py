@@ -0,0 +1,82 @@
+"""
+The API wired to a throwaway SQLite database, for endpoint tests.
+
+tests/conftest.py targets the PostgreSQL/Mongo/Redis stack, so the tests
+that use this run without it:
+
+    python -m pytest --noconftest -o addopts="" tests/test_tender_api.py
+
+Every test gets a fresh database file and empty in-process indexes and
+caches, so tender ids restarting at 1 never hit another test's entries.
+"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import crud, database, fulltext
+from app.database import Base, RoutingSession
+from app.deadline_index import closing_soon_index
+from app.routers import health, metrics, tenders, workspaces
+from app.search_index import tender_index
+from app.single_flight import tender_lists, tender_reads
+
+
+class StatementCounter:
+    """Counts the SQL statements an engine runs while enabled."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def reset_in_process_state(db):
+    tender_index.clear()
+    closing_soon_index.load(db)
+    crud.facet_cache.clear()
+    tender_reads.clear()
+    tender_lists.clear()
+
+
+@pytest.fixture
+def api(tmp_path):
+    path = tmp_path / "app.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    database.enforce_foreign_keys(engine)
+    Base.metadata.create_all(engine)
+    fulltext.install(engine)
+
+    saved = dict(database.SessionLocal.kw)
+    database.SessionLocal.configure(primary=engine, replicas=[])
+    # aiosqlite connections belong to the loop that opened them, hence no pooling
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    database.enforce_foreign_keys(async_engine.sync_engine)
+    async_sessions = async_sessionmaker(
+        sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+        primary=async_engine.sync_engine,
+    )
+
+    async def get_async_db():
+        async with async_sessions() as db:
+            yield db
+
+    with database.SessionLocal() as db:
+        reset_in_process_state(db)
+
+    app = FastAPI()
+    for router in (tenders.router, workspaces.router, metrics.router, health.router):
+        app.include_router(router)
+    app.dependency_overrides[database.get_async_db] = get_async_db
+    with TestClient(app) as client:
+        yield SimpleNamespace(client=client, engine=engine, Session=database.SessionLocal,
+                              statements=StatementCounter(engine))
+    database.SessionLocal.kw.clear()
+    database.SessionLocal.kw.update(saved)
+    engine.dispose()
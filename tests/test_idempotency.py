@@ -0,0 +1,44 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app import idempotency
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = idempotency.MemoryIdempotencyStore()
+    monkeypatch.setattr(idempotency, "_store", store)
+    return store
+
+
+def test_reservation_is_renewed_while_the_handler_runs(store, monkeypatch):
+    monkeypatch.setattr(idempotency, "PENDING_TTL_SECONDS", 0.2)
+    monkeypatch.setattr(idempotency, "PENDING_RENEW_SECONDS", 0.05)
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_handler():
+        started.set()
+        finish.wait(5)
+        return {"ok": True}
+
+    first = threading.Thread(target=idempotency.run_once, args=("t", "k", "fp", slow_handler))
+    first.start()
+    started.wait(5)
+    time.sleep(0.5)  # well past the reservation TTL
+    with pytest.raises(HTTPException) as retry:
+        idempotency.run_once("t", "k", "fp", lambda: {"ok": False})
+    finish.set()
+    first.join()
+
+    assert retry.value.status_code == 409
+    assert idempotency.run_once("t", "k", "fp", lambda: {"ok": False}).body == b'{"ok":true}'
+
+
+def test_several_workers_without_redis_warn_at_startup(caplog):
+    with caplog.at_level("WARNING", logger="app.idempotency"):
+        idempotency.check_deployment(1)
+        idempotency.check_deployment(4)
+    assert len(caplog.records) == 1 and "IDEMPOTENCY_REDIS_URL" in caplog.text
@@ -0,0 +1,45 @@
+import asyncio
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app import async_crud, readiness
+from app.database import Base
+from sqlite_app import api  # noqa: F401  (fixture)
+
+
+def test_ready_is_503_until_every_component_is_warm(api, monkeypatch):
+    monkeypatch.setattr(readiness, "readiness_checks", {})
+    readiness.mark_ready("in_process_indexes")
+    readiness.mark_ready("async_pools", False)
+
+    assert api.client.get("/health").json() == {"status": "ok"}
+    starting = api.client.get("/ready")
+    assert starting.status_code == 503
+    assert starting.json()["components"] == {"in_process_indexes": True, "async_pools": False}
+
+    readiness.mark_ready("async_pools")
+    assert api.client.get("/ready").json()["status"] == "ready"
+
+
+def test_warm_pool_opens_every_connection_and_runs_the_hot_statements(tmp_path):
+    url = f"sqlite:///{tmp_path / 'warm.db'}"
+    Base.metadata.create_all(create_engine(url))
+    engine = create_async_engine(url.replace("sqlite", "sqlite+aiosqlite"),
+                                 poolclass=AsyncAdaptedQueuePool, pool_size=3, max_overflow=0)
+    statements = async_crud.hot_statements()
+    connects, executed = [], []
+    event.listen(engine.sync_engine.pool, "connect", lambda *args: connects.append(1))
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, sql, *args: executed.append(sql))
+
+    async def warm():
+        await readiness.warm_pool(engine, 3, statements)
+        checked_in = engine.sync_engine.pool.checkedin()
+        await engine.dispose()
+        return checked_in
+
+    assert asyncio.run(warm()) == 3
+    assert len(connects) == 3
+    assert len(executed) == 3 * len(statements)
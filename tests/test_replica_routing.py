@@ -0,0 +1,66 @@
+from sqlalchemy import create_engine, select, text
+
+from app import models
+from app.database import RoutingSession
+
+
+def test_a_session_keeps_one_replica_and_sessions_rotate():
+    primary, *replicas = (create_engine("sqlite://") for _ in range(3))
+    first = RoutingSession(primary=primary, replicas=replicas)
+    second = RoutingSession(primary=primary, replicas=replicas)
+
+    reads = [first.get_bind(clause=select(models.Tender)) for _ in range(3)]
+    other = second.get_bind(clause=text("SELECT 1"))
+
+    assert reads[0] in replicas and reads == [reads[0]] * 3
+    assert other in replicas and other is not reads[0]
+
+
+def request_from(host, **headers):
+    from starlette.requests import Request
+
+    return Request({
+        "type": "http", "client": (host, 50000),
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def test_clients_behind_the_proxy_are_pinned_separately(monkeypatch):
+    import ipaddress
+    from app import database
+
+    monkeypatch.setattr(database, "TRUSTED_PROXIES", [ipaddress.ip_network("172.20.0.0/16")])
+    proxy = "172.20.0.5"
+
+    assert database._pin_key(request_from(proxy)) is None
+    assert database._pin_key(request_from(proxy, x_forwarded_for="203.0.113.7")) == "203.0.113.7"
+    assert database._pin_key(request_from(proxy, x_forwarded_for="6.6.6.6, 198.51.100.2, 172.20.0.9")) \
+        == "198.51.100.2"
+    # Not from a trusted proxy: the header may be forged, and the peer is not a client id
+    assert database._pin_key(request_from("198.51.100.2", x_forwarded_for="203.0.113.7")) is None
+    assert database._pin_key(request_from(proxy, x_client_id="c-1")) == "c-1"
+    token = database._pin_key(request_from(proxy, authorization="Bearer abc"))
+    assert token.startswith("token:") and "abc" not in token
+
+
+def test_a_write_behind_the_proxy_only_pins_its_own_client(monkeypatch):
+    import ipaddress
+    from app import database
+
+    monkeypatch.setattr(database, "TRUSTED_PROXIES", [ipaddress.ip_network("172.20.0.0/16")])
+    pins = database.ReplicaPins(60)
+    monkeypatch.setattr(database, "replica_pins", pins)
+    writer = database._pin_key(request_from("172.20.0.5", x_forwarded_for="203.0.113.7"))
+    reader = database._pin_key(request_from("172.20.0.5", x_forwarded_for="203.0.113.8"))
+
+    primary, replica = create_engine("sqlite://"), create_engine("sqlite://")
+    write = RoutingSession(primary=primary, replicas=[replica], info={"pin_key": writer})
+    write.get_bind(clause=models.Tender.__table__.insert())
+    write.commit()
+
+    def read_bind(pin_key):
+        session = RoutingSession(primary=primary, replicas=[replica], info={"pin_key": pin_key})
+        return session.get_bind(clause=select(models.Tender))
+
+    assert read_bind(writer) is primary
+    assert read_bind(reader) is replica
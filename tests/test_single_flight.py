@@ -0,0 +1,32 @@
+from app.single_flight import SingleFlight
+
+
+def test_invalidate_drops_only_the_group_and_forgets_finished_keys():
+    flight = SingleFlight("test-groups", ttl=60)
+    uncached = SingleFlight("test-uncached", ttl=0)
+    for team_id in (1, 2):
+        for page in ("a", "b"):
+            flight.call((team_id, page), lambda: object())
+            uncached.call((team_id, page), lambda: object())
+
+    flight.invalidate(1)
+
+    assert sorted(flight._recent) == [(2, "a"), (2, "b")]
+    assert set(flight._groups) == {2}
+    assert uncached._groups == {}
+
+
+def test_bulk_create_invalidates_team_caches_once_per_team(monkeypatch):
+    from app import crud
+    from types import SimpleNamespace
+
+    dropped = []
+    monkeypatch.setattr(crud.tender_lists, "invalidate", dropped.append)
+    monkeypatch.setattr(crud.facet_cache, "invalidate", dropped.append)
+    tenders = [SimpleNamespace(tender_id=i, team_id=i % 2, title="t", description=None,
+                               deadline=None, province=None, buyer=None, budget=None)
+               for i in range(10)]
+
+    crud.tenders_saved(tenders, team_ids=[7])
+
+    assert sorted(dropped) == [0, 0, 1, 1, 7, 7]
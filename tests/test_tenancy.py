@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import Column, ForeignKey, Integer, String, create_engine, delete, select, update
+from sqlalchemy.orm import aliased, declarative_base
+
+from app.tenancy import TenantSession
+
+Base = declarative_base()
+
+
+class Project(Base):
+    __tablename__ = "projects"
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(String(36), nullable=False)
+    name = Column(String(50))
+
+
+class Task(Base):
+    __tablename__ = "tasks"
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(String(36), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"))
+    title = Column(String(50))
+
+
+projects, tasks = Project.__table__, Task.__table__
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with TenantSession(engine) as db:
+        for tenant, project_id in (("a", 1), ("b", 2)):
+            db.add(Project(id=project_id, tenant_id=tenant, name=f"project {tenant}"))
+            db.add(Task(id=project_id, tenant_id=tenant, project_id=project_id, title=f"task {tenant}"))
+        db.commit()
+        db.info["tenant_id"] = "a"
+        yield db
+
+
+def test_orm_statements_are_scoped(session):
+    joined = select(Task.title).join(Project, Project.id == Task.project_id)
+    other = aliased(Project)
+
+    assert session.scalars(select(Project.name)).all() == ["project a"]
+    assert session.scalars(joined).all() == ["task a"]
+    assert session.scalars(select(other.name)).all() == ["project a"]
+
+
+def test_core_selects_scope_every_table_they_read(session):
+    joined = select(tasks.c.title).select_from(tasks.join(projects, projects.c.id == tasks.c.project_id))
+    implicit = select(tasks.c.title, projects.c.name).where(tasks.c.project_id == projects.c.id)
+    alias = projects.alias("p")
+
+    assert session.scalars(select(projects.c.name)).all() == ["project a"]
+    assert session.scalars(joined).all() == ["task a"]
+    assert session.execute(implicit).all() == [("task a", "project a")]
+    assert session.scalars(select(alias.c.name)).all() == ["project a"]
+
+
+def test_core_update_and_delete_only_touch_the_tenant(session):
+    session.execute(update(projects).values(name="renamed"))
+    session.execute(delete(tasks))
+    session.info["tenant_id"] = None
+
+    assert session.scalars(select(projects.c.name).order_by(projects.c.id)).all() == ["renamed", "project b"]
+    assert session.scalars(select(tasks.c.title)).all() == ["task b"]
+
+
+def test_execution_option_overrides_the_session_tenant(session):
+    rows = session.scalars(select(projects.c.name), execution_options={"tenant_id": "b"}).all()
+    assert rows == ["project b"]
+
+
+def test_unscopable_subqueries_are_rejected(session):
+    inner = select(projects.c.id).subquery()
+    with pytest.raises(ValueError):
+        session.execute(select(inner.c.id))
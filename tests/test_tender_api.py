@@ -0,0 +1,357 @@
+"""Tender endpoints against SQLite; see tests/sqlite_app.py."""
+import json
+
+import pytest
+from sqlalchemy import create_mock_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app import crud, fulltext
+from core.settings import settings
+from sqlite_app import api  # noqa: F401  (fixture)
+
+
+def tender(i, team_id=1, **fields):
+    return {"title": f"Tender {i}", "team_id": team_id, **fields}
+
+
+def test_change_feed_numbers_every_bulk_row_after_existing_changes(api):
+    api.client.post("/tenders/", json=tender(0))
+    api.client.post("/tenders/bulk", json=[tender(i) for i in range(1, 6)])
+    api.client.post("/tenders/bulk", json=[tender(i) for i in range(6, 9)])
+
+    page = api.client.get("/tenders/changes", params={"team_id": 1}).json()
+
+    assert [change["change_seq"] for change in page["changes"]] == list(range(1, 10))
+    assert page["next_since"] == 9
+
+
+def test_postgresql_numbers_changes_by_transaction_without_a_lock():
+    numbering = str(crud.change_seq_value("postgresql").compile(dialect=postgresql.dialect()))
+    feed = str(crud.tender_changes_statement(1, since=5).compile(dialect=postgresql.dialect()))
+
+    assert "pg_advisory_xact_lock" not in numbering
+    assert "pg_current_xact_id()" in numbering and "nextval('tenders_change_seq')" in numbering
+    assert "pg_snapshot_xmin(pg_current_snapshot())" in feed
+
+
+def write_as_another_worker(api, sql, **params):
+    """Writes behind this process's back, as a different worker process would."""
+    from sqlalchemy import text
+
+    with api.engine.begin() as conn:
+        conn.execute(text(sql), params)
+
+
+def test_closing_soon_catches_up_with_other_workers_writes(api, monkeypatch):
+    from datetime import date, timedelta
+    from app.deadline_index import closing_soon_index
+
+    monkeypatch.setattr(closing_soon_index, "refresh_seconds", 0)
+    soon = (date.today() + timedelta(days=2)).isoformat()
+    kept = api.client.post("/tenders/", json=tender(1, deadline=soon)).json()["tender_id"]
+    dropped = api.client.post("/tenders/", json=tender(2, deadline=soon)).json()["tender_id"]
+    write_as_another_worker(
+        api, "INSERT INTO tenders (team_id, title, deadline, change_seq) "
+             "VALUES (1, 'Elsewhere', :deadline, (SELECT max(change_seq) + 1 FROM tenders))",
+        deadline=soon)
+    write_as_another_worker(
+        api, "UPDATE tenders SET deleted_at = CURRENT_TIMESTAMP, "
+             "change_seq = (SELECT max(change_seq) + 1 FROM tenders) WHERE tender_id = :id",
+        id=dropped)
+    write_as_another_worker(
+        api, "UPDATE tenders SET title = 'Renamed', "
+             "change_seq = (SELECT max(change_seq) + 1 FROM tenders) WHERE tender_id = :id",
+        id=kept)
+
+    rows = api.client.get("/tenders/closing-soon", params={"team_id": 1}).json()
+
+    assert [row["title"] for row in rows] == ["Renamed", "Elsewhere"]
+
+
+def test_search_index_catches_up_with_other_workers_writes(api, monkeypatch):
+    from app.search_index import tender_index
+
+    monkeypatch.setattr(tender_index, "refresh_seconds", 0)
+    gone = api.client.post("/tenders/", json=tender(1, title="Bridge repair")).json()["tender_id"]
+    write_as_another_worker(
+        api, "INSERT INTO tenders (team_id, title, change_seq) "
+             "VALUES (1, 'Bridge inspection', (SELECT max(change_seq) + 1 FROM tenders))")
+    write_as_another_worker(
+        api, "UPDATE tenders SET deleted_at = CURRENT_TIMESTAMP, "
+             "change_seq = (SELECT max(change_seq) + 1 FROM tenders) WHERE tender_id = :id",
+        id=gone)
+
+    hits = api.client.get("/tenders/search", params={"q": "bridge", "team_id": 1}).json()
+
+    assert [hit["tender"]["title"] for hit in hits] == ["Bridge inspection"]
+
+
+def test_list_etag_costs_one_statement_and_changes_with_the_page(api):
+    for i in range(3):
+        api.client.post("/tenders/", json=tender(i, deadline=f"2030-01-0{i + 1}"))
+    params = {"team_id": 1, "limit": 2}
+
+    api.statements.count = 0
+    first = api.client.get("/tenders/", params=params)
+    statements = api.statements.count
+    etag = first.headers["etag"]
+    unchanged = api.client.get("/tenders/", params=params, headers={"If-None-Match": etag})
+    api.client.put(f"/tenders/{first.json()['items'][0]['tender_id']}", json={"title": "Renamed"})
+    changed = api.client.get("/tenders/", params=params, headers={"If-None-Match": etag})
+
+    assert statements == 1
+    assert unchanged.status_code == 304
+    assert changed.status_code == 200 and changed.json()["items"][0]["title"] == "Renamed"
+
+
+def test_read_tender_answers_304_without_serializing(api, monkeypatch):
+    from app import etags
+    from app.single_flight import tender_reads
+
+    tender_id = api.client.post("/tenders/", json=tender(1)).json()["tender_id"]
+    etag = api.client.get(f"/tenders/{tender_id}").headers["etag"]
+    tender_reads.invalidate(tender_id)  # no reuse of the body the first read serialized
+    serialized = []
+    monkeypatch.setattr(etags, "dumps", lambda payload: serialized.append(payload) or b"{}")
+
+    response = api.client.get(f"/tenders/{tender_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304 and serialized == []
+
+
+def page_ids(response):
+    return [item["tender_id"] for item in response.json()["items"]]
+
+
+def test_cursor_paging_round_trips_with_null_deadlines(api):
+    deadlines = ["2030-01-02", None, "2030-01-01", None, "2030-01-02"]
+    ids = [api.client.post("/tenders/", json=tender(i, deadline=d)).json()["tender_id"]
+           for i, d in enumerate(deadlines)]
+
+    for sort, expected in [("deadline", [ids[2], ids[0], ids[4], ids[1], ids[3]]),
+                           ("-deadline", [ids[3], ids[1], ids[4], ids[0], ids[2]])]:
+        params = {"team_id": 1, "limit": 2, "sort": sort}
+        pages = [api.client.get("/tenders/", params=params).json()]
+        while pages[-1]["next_cursor"]:
+            pages.append(api.client.get("/tenders/", params={
+                **params, "cursor": pages[-1]["next_cursor"]}).json())
+        back = api.client.get("/tenders/", params={**params, "cursor": pages[-1]["prev_cursor"]})
+
+        assert [item["tender_id"] for page in pages for item in page["items"]] == expected
+        assert pages[0]["prev_cursor"] is None
+        assert back.json()["items"] == pages[-2]["items"]
+
+
+def test_cursor_issued_for_another_sort_is_rejected(api):
+    for i in range(3):
+        api.client.post("/tenders/", json=tender(i, budget=i * 10.0))
+    cursor = api.client.get("/tenders/", params={"team_id": 1, "limit": 1}).json()["next_cursor"]
+
+    response = api.client.get("/tenders/", params={"team_id": 1, "sort": "budget", "cursor": cursor})
+    garbage = api.client.get("/tenders/", params={"team_id": 1, "cursor": "not-a-cursor"})
+
+    assert response.status_code == 400 and garbage.status_code == 400
+
+
+def test_bulk_ingest_reports_invalid_rows_from_json_and_ndjson(api):
+    array = api.client.post("/tenders/bulk", params={"chunk_size": 2},
+                            json=[tender(0), {"team_id": 1}, tender(2)]).json()
+    ndjson = api.client.post("/tenders/bulk", content=b'{"title": "A", "team_id": 1}\n{broken\n\n',
+                             headers={"Content-Type": "application/x-ndjson"}).json()
+    not_a_list = api.client.post("/tenders/bulk", json={"title": "A", "team_id": 1})
+
+    assert (array["created"], array["failed"]) == (2, 1)
+    assert [r["status"] for r in array["results"]] == ["created", "invalid", "created"]
+    assert array["results"][1]["errors"][0]["loc"] == ["title"]
+    assert [r["status"] for r in ndjson["results"]] == ["created", "invalid"]
+    assert not_a_list.status_code == 400
+    listed = api.client.get("/tenders/", params={"team_id": 1}).json()["items"]
+    assert sorted(item["title"] for item in listed) == ["A", "Tender 0", "Tender 2"]
+
+
+def test_export_streams_the_teams_live_tenders(api):
+    ids = [api.client.post("/tenders/", json=tender(i, budget=1.5)).json()["tender_id"]
+           for i in range(3)]
+    api.client.post("/tenders/", json=tender(9, team_id=2))
+    api.client.delete(f"/tenders/{ids[1]}")
+
+    ndjson = api.client.get("/tenders/export", params={"team_id": 1})
+    csv_export = api.client.get("/tenders/export", params={"team_id": 1, "format": "csv"})
+
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [row["tender_id"] for row in rows] == [ids[0], ids[2]]
+    assert rows[0]["budget"] == 1.5
+    lines = csv_export.text.splitlines()
+    assert lines[0] == ",".join(crud.TENDER_FIELDS)
+    assert [line.split(",")[0] for line in lines[1:]] == [str(ids[0]), str(ids[2])]
+
+
+def test_update_and_delete_of_a_missing_tender_are_404(api):
+    tender_id = api.client.post("/tenders/", json=tender(1)).json()["tender_id"]
+
+    updated = api.client.put(f"/tenders/{tender_id}", json={"title": "Renamed"})
+    deleted = api.client.delete(f"/tenders/{tender_id}")
+
+    assert updated.json()["title"] == "Renamed" and deleted.json()["title"] == "Renamed"
+    assert api.client.delete(f"/tenders/{tender_id}").status_code == 404
+    assert api.client.put(f"/tenders/{tender_id}", json={"title": "Again"}).status_code == 404
+    assert api.client.put("/tenders/999", json={"title": "Missing"}).status_code == 404
+    assert api.client.get(f"/tenders/{tender_id}").status_code == 404
+
+
+def search(api, q, team_id=1):
+    response = api.client.get("/tenders/search", params={"q": q, "team_id": team_id})
+    assert response.status_code == 200
+    return [hit["tender"]["title"] for hit in response.json()]
+
+
+def test_database_search_follows_inserts_updates_and_deletes(api, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_BACKEND", "database")
+    api.client.post("/tenders/", json=tender(1, title="Road resurfacing", buyer="Roads Agency"))
+    bridge = api.client.post("/tenders/", json=tender(2, title="Bridge repair")).json()["tender_id"]
+    api.client.post("/tenders/", json=tender(3, title="Office chairs", description="for the roads depot"))
+    gone = api.client.post("/tenders/", json=tender(4, title="Roads signage")).json()["tender_id"]
+    api.client.post("/tenders/", json=tender(5, title="Roads elsewhere", team_id=2))
+
+    assert search(api, "roads") == ["Roads signage", "Road resurfacing", "Office chairs"]
+    api.client.put(f"/tenders/{bridge}", json={"title": "Bridge and roads repair"})
+    api.client.delete(f"/tenders/{gone}")
+    write_as_another_worker(api, "DELETE FROM tenders WHERE title = 'Office chairs'")
+
+    assert search(api, "roads") == ["Bridge and roads repair", "Road resurfacing"]
+    assert search(api, "bridge") == ["Bridge and roads repair"]
+    assert search(api, "signage") == []
+
+
+def test_database_search_quotes_fts5_syntax_in_the_query(api, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_BACKEND", "database")
+    api.client.post("/tenders/", json=tender(1, title="Near the river"))
+
+    assert fulltext._fts5_query('NEAR(river "xy) title:*') == '"near" "river" "xy" "title"'
+    assert search(api, 'NEAR(river "') == ["Near the river"]
+    assert search(api, "title:river OR *") == []
+    assert search(api, '"') == []
+
+
+def test_database_search_is_not_available_on_other_dialects():
+    db = Session(bind=create_mock_engine("mysql://", lambda *args, **kwargs: None))
+    with pytest.raises(NotImplementedError, match="mysql"):
+        fulltext.search_tenders(db, "roads", team_id=1)
+
+
+def test_postgresql_search_uses_the_indexed_expression():
+    index = fulltext.PG_DDL[-1]
+    assert "coalesce(buyer, '')" in index
+    assert index.endswith("USING gin (" + fulltext.PG_TENDER_VECTOR.replace("tenders.", "") + ")")
+
+
+def test_fields_selects_the_returned_columns(api):
+    tender_id = api.client.post("/tenders/", json=tender(1, budget=5.0)).json()["tender_id"]
+
+    listed = api.client.get("/tenders/", params={"team_id": 1, "fields": "title, budget"})
+    read = api.client.get(f"/tenders/{tender_id}", params={"fields": "budget"})
+    unknown = api.client.get("/tenders/", params={"team_id": 1, "fields": "title,secret"})
+    empty = api.client.get(f"/tenders/{tender_id}", params={"fields": " , "})
+
+    assert listed.json()["items"] == [{"title": "Tender 1", "budget": 5.0}]
+    assert read.json() == {"budget": 5.0}
+    assert unknown.status_code == 400 and "secret" in unknown.json()["detail"]
+    assert empty.status_code == 400
+    assert empty.json()["detail"] == "fields must name at least one field"
+
+
+def test_facets_count_the_filtered_tenders_and_follow_writes(api):
+    for i, (province, budget) in enumerate([("Gauteng", 50_000), ("Gauteng", 2_000_000),
+                                            ("Limpopo", 500_000), (None, None)]):
+        api.client.post("/tenders/", json=tender(i, province=province, budget=budget, buyer="Dept"))
+
+    facets = api.client.get("/tenders/facets", params={"team_id": 1}).json()
+    filtered = api.client.get("/tenders/facets", params={"team_id": 1, "province": "Gauteng"}).json()
+    api.client.post("/tenders/", json=tender(9, province="Limpopo"))
+    after_write = api.client.get("/tenders/facets", params={"team_id": 1}).json()
+
+    assert facets["total"] == 4
+    assert facets["province"] == [{"value": "Gauteng", "count": 2}, {"value": "Limpopo", "count": 1},
+                                  {"value": None, "count": 1}]
+    assert {item["value"]: item["count"] for item in facets["budget_band"]} == {
+        "under_100k": 1, "100k_1m": 1, "1m_10m": 1, None: 1}
+    assert filtered["total"] == 2 and filtered["buyer"] == [{"value": "Dept", "count": 2}]
+    assert after_write["total"] == 5
+
+
+def test_idempotent_create_replays_and_rejects_reuse(api, monkeypatch):
+    from app import idempotency, schemas
+
+    store = idempotency.MemoryIdempotencyStore()
+    monkeypatch.setattr(idempotency, "_store", store)
+    headers = {"Idempotency-Key": "create-1"}
+
+    first = api.client.post("/tenders/", json=tender(1), headers=headers)
+    replay = api.client.post("/tenders/", json=tender(1), headers=headers)
+    reused = api.client.post("/tenders/", json=tender(2), headers=headers)
+    store.reserve("idempotency:tenders:create:create-2",
+                  {"fingerprint": idempotency.fingerprint(schemas.TenderCreate(**tender(1)).dict()),
+                   "status": idempotency.PENDING},
+                  idempotency.PENDING_TTL_SECONDS)
+    in_progress = api.client.post("/tenders/", json=tender(1), headers={"Idempotency-Key": "create-2"})
+
+    assert replay.json() == first.json() and replay.headers["idempotent-replayed"] == "true"
+    assert reused.status_code == 422
+    assert in_progress.status_code == 409
+    assert len(api.client.get("/tenders/", params={"team_id": 1}).json()["items"]) == 1
+
+
+def test_concurrent_identical_list_requests_share_one_query(api, monkeypatch):
+    import threading
+    import time
+    from app.single_flight import tender_lists
+
+    api.client.post("/tenders/", json=tender(1))
+    callers = 4
+    loads = []
+    load_page = crud.get_tenders_page_with_version
+
+    def slow_load(*args):
+        loads.append(1)
+        deadline = time.monotonic() + 5
+        # Hold the query until every other caller has joined it
+        while tender_lists.shared < callers - 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return load_page(*args)
+
+    monkeypatch.setattr(crud, "get_tenders_page_with_version", slow_load)
+    monkeypatch.setattr(tender_lists, "shared", 0)
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(
+        api.client.get("/tenders/", params={"team_id": 1}))) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert len({response.content for response in responses}) == 1 and len(responses) == callers
+    api.client.post("/tenders/", json=tender(2))
+    assert len(api.client.get("/tenders/", params={"team_id": 1}).json()["items"]) == 2
+    assert len(loads) == 2
+
+
+def test_a_pinned_writer_never_reads_a_replica_result_another_client_cached(api, tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+    from app import database
+    from app.single_flight import tender_lists
+
+    stale = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    database.Base.metadata.create_all(stale)
+    database.SessionLocal.configure(replicas=[stale])
+    monkeypatch.setattr(tender_lists, "ttl", 60)
+    params = {"team_id": 1}
+
+    api.client.post("/tenders/", json=tender(1), headers={"X-Client-Id": "writer"})
+    other = api.client.get("/tenders/", params=params).json()["items"]
+    own = api.client.get("/tenders/", params=params, headers={"X-Client-Id": "writer"}).json()["items"]
+
+    assert other == []  # the lagging replica, now cached for unpinned readers
+    assert [item["title"] for item in own] == ["Tender 1"]
@@ -0,0 +1,93 @@
+"""
+Query-plan checks for the filtered tender listing.
+
+Every filter/sort combination accepted by GET /tenders must be answered
+from one of the composite indexes on models.Tender, never a table scan.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.database import Base
+from app.pagination import encode_cursor
+
+FILTER_COMBINATIONS = [
+    {},
+    {"province": "Gauteng"},
+    {"buyer": "Department of Health"},
+    {"deadline_from": date(2025, 1, 1), "deadline_to": date(2025, 3, 31)},
+    {"min_budget": 100000.0, "max_budget": 500000.0},
+    {"province": "Gauteng", "deadline_from": date(2025, 1, 1)},
+    {"province": "Gauteng", "min_budget": 100000.0},
+    {"buyer": "Department of Health", "deadline_to": date(2025, 3, 31)},
+]
+SORTS = ["deadline", "-deadline", "budget", "-budget"]
+
+
+@pytest.fixture(scope="module")
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def query_plan(db, stmt):
+    compiled = stmt.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    return [row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+
+
+@pytest.mark.parametrize("sort", SORTS)
+@pytest.mark.parametrize("filters", FILTER_COMBINATIONS)
+def test_tender_listing_uses_index(db, filters, sort):
+    stmt, _ = crud.tenders_page_statement(
+        team_id=1, limit=50, filters=schemas.TenderFilters(**filters), sort=sort
+    )
+    plan = query_plan(db, stmt)
+
+    table_steps = [step for step in plan if "tenders" in step]
+    assert table_steps, plan
+    for step in table_steps:
+        assert "USING" in step and "INDEX" in step, plan
+
+
+@pytest.mark.parametrize("sort, value, seek", [
+    ("deadline", date(2025, 3, 1), "ix_tenders_team_deadline (team_id=? AND deadline>?)"),
+    ("-deadline", date(2025, 3, 1), "ix_tenders_team_deadline (team_id=? AND deadline<?)"),
+    ("budget", 250000.0, "ix_tenders_team_budget (team_id=? AND budget>?)"),
+    ("-budget", 250000.0, "ix_tenders_team_budget (team_id=? AND budget<?)"),
+])
+def test_deep_page_seeks_to_the_cursor(db, sort, value, seek):
+    cursor = encode_cursor({"sort": sort, "value": value, "tender_id": 5000}, "next")
+    stmt, _ = crud.tenders_page_statement(team_id=1, limit=50, cursor=cursor, sort=sort)
+    plan = query_plan(db, stmt)
+
+    assert any(seek in step for step in plan), plan
+    assert not any(step.endswith("(team_id=?)") for step in plan), plan
+
+
+def test_closing_soon_uses_deadline_index(db):
+    stmt = crud.closing_soon_statement(1, date(2025, 1, 1), date(2025, 1, 8))
+    plan = query_plan(db, stmt)
+
+    assert any("ix_tenders_team_deadline" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_change_feed_uses_change_seq_index(db):
+    plan = query_plan(db, crud.tender_changes_statement(1, since=100, limit=500, dialect_name="sqlite"))
+
+    assert any("ix_tenders_team_change_seq" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_export_reads_a_team_in_index_order(db):
+    plan = query_plan(db, crud.export_tenders_statement(1))
+
+    assert any("USING" in step and "INDEX" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
@@ -1,11 +1,197 @@
-from fastapi.testclient import TestClient
-from app.main import app
+import uuid
 
-client = TestClient(app)
+import pytest
+from app import models
+from sqlite_app import api  # noqa: F401  (fixture)
 
 
-def test_create_workspace():
-    response = client.post("/workspaces/", json={"name": "Test Workspace", "description": "Demo"})
+def add_user(api, user_id=None):
+    user_id = user_id or uuid.uuid4()
+    with api.Session() as db:
+        if db.get(models.User, user_id) is None:
+            db.add(models.User(id=user_id, email=f"{user_id}@example.com"))
+            db.commit()
+    return user_id
+
+
+def add_member(api, workspace_id, role="editor", user_id=None):
+    user_id = add_user(api, user_id)
+    with api.Session() as db:
+        db.add(models.WorkspaceMember(workspace_id=uuid.UUID(workspace_id), user_id=user_id,
+                                      role=models.WorkspaceRole(role)))
+        db.commit()
+    return user_id
+
+
+def make_workspace(api, name, user_id=None):
+    user_id = add_user(api, user_id)
+    response = api.client.post("/workspaces/", params={"user_id": str(user_id)},
+                               json={"name": name, "description": None})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def test_created_workspace_is_listed_for_its_owner(api):
+    user_id = add_user(api)
+
+    response = api.client.post("/workspaces/", params={"user_id": str(user_id)},
+                               json={"name": "Test Workspace", "description": "Demo"})
+    listed = api.client.get("/workspaces/", params={"user_id": str(user_id)}).json()["items"]
+
     assert response.status_code == 200
     data = response.json()
-    assert data["name"] == "Test Workspace"
+    assert data["name"] == "Test Workspace" and data["created_by"] == str(user_id)
+    assert [(item["id"], item["role"], item["member_count"]) for item in listed] == [
+        (data["id"], "owner", 1)]
+
+
+def test_creating_a_workspace_for_a_missing_user_is_404(api):
+    response = api.client.post("/workspaces/", params={"user_id": str(uuid.uuid4())},
+                               json={"name": "W", "description": None})
+    assert response.status_code == 404
+
+
+def test_list_workspaces_only_returns_memberships_with_counts(api):
+    user_id = add_user(api)
+    mine, other = make_workspace(api, "Mine", user_id), make_workspace(api, "Other")
+    add_member(api, mine)
+    api.client.post(f"/workspaces/{mine}/notes", json={"title": "a", "content": "x"})
+    api.client.post(f"/workspaces/{mine}/links", json={"link_type": "url", "reference": "https://x"})
+
+    response = api.client.get("/workspaces/", params={"user_id": str(user_id)})
+
+    assert response.status_code == 200
+    (item,) = response.json()["items"]
+    assert item["id"] == mine and item["role"] == "owner"
+    assert (item["member_count"], item["note_count"], item["link_count"]) == (2, 1, 1)
+
+
+def test_list_workspaces_pages_with_a_constant_statement_count(api):
+    user_id = uuid.uuid4()
+    ids = [make_workspace(api, f"W{i}") for i in range(7)]
+    for workspace_id in ids:
+        add_member(api, workspace_id, user_id=user_id)
+
+    seen, cursor, statements = [], None, []
+    while True:
+        params = {"user_id": str(user_id), "limit": 3, **({"cursor": cursor} if cursor else {})}
+        api.statements.count = 0
+        page = api.client.get("/workspaces/", params=params).json()
+        statements.append(api.statements.count)
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == list(reversed(ids))  # newest first, each exactly once
+    assert statements == [1, 1, 1]
+
+
+def test_list_workspaces_rejects_a_malformed_cursor(api):
+    response = api.client.get("/workspaces/", params={"user_id": str(uuid.uuid4()), "cursor": "x"})
+    assert response.status_code == 400
+
+
+def test_adding_to_a_missing_workspace_is_404(api):
+    missing = uuid.uuid4()
+    note = api.client.post(f"/workspaces/{missing}/notes", json={"title": "a", "content": "x"})
+    bulk = api.client.post(f"/workspaces/{missing}/links:bulk",
+                           json=[{"link_type": "url", "reference": "https://x"}])
+    assert note.status_code == bulk.status_code == 404
+
+
+def test_other_constraint_violations_are_not_reported_as_a_missing_workspace(api):
+    from fastapi import HTTPException
+    from sqlalchemy import insert
+    from app.routers.workspaces import _insert_or_404
+
+    workspace_id = uuid.UUID(make_workspace(api, "W"))
+    stmt = (insert(models.Note)
+            .values(workspace_id=workspace_id, title="a", created_by=uuid.uuid4())
+            .returning(models.Note.id))
+    with api.Session() as db, pytest.raises(HTTPException) as raised:
+        _insert_or_404(db, stmt, models.Note, workspace_id)
+    assert raised.value.status_code == 409
+
+
+def test_note_search_index_is_keyed_on_note_ids(api):
+    from sqlalchemy import text
+
+    workspace_id = make_workspace(api, "W")
+    for title in ("first", "second", "third"):
+        api.client.post(f"/workspaces/{workspace_id}/notes",
+                        json={"title": title, "content": f"{title} tender clause"})
+    with api.engine.begin() as conn:
+        conn.execute(text("DELETE FROM notes WHERE title = 'first'"))
+    with api.engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+        indexed = set(conn.execute(text("SELECT note_id FROM notes_fts")).scalars())
+        stored = set(conn.execute(text("SELECT id FROM notes")).scalars())
+
+    response = api.client.get(f"/workspaces/{workspace_id}/notes/search", params={"q": "third"})
+
+    # VACUUM may renumber notes' implicit rowids, so only the id may tie the two
+    assert indexed == stored
+    assert [hit["title"] for hit in response.json()["items"]] == ["third"]
+
+
+def test_compressed_notes_are_searchable_past_the_excerpt_and_listed_as_truncated(api):
+    from core.settings import settings
+
+    workspace_id = make_workspace(api, "W")
+    filler = "clause " * (settings.NOTE_COMPRESSION_THRESHOLD_BYTES // 7 + 1)
+    created = api.client.post(f"/workspaces/{workspace_id}/notes",
+                              json={"title": "spec", "content": filler + "turbine"}).json()
+    api.client.post(f"/workspaces/{workspace_id}/notes:bulk",
+                    json=[{"title": "bulk spec", "content": filler + "gearbox"}])
+
+    hits = {q: [hit["title"] for hit in api.client.get(
+        f"/workspaces/{workspace_id}/notes/search", params={"q": q}).json()["items"]]
+        for q in ("turbine", "gearbox")}
+    listed = {note["title"]: note for note in
+              api.client.get(f"/workspaces/{workspace_id}/notes").json()["items"]}
+    full = api.client.get(f"/workspaces/{workspace_id}/notes/{created['id']}").json()
+
+    assert hits == {"turbine": ["spec"], "gearbox": ["bulk spec"]}
+    assert listed["spec"]["content_truncated"]
+    assert len(listed["spec"]["content"]) == settings.NOTE_EXCERPT_CHARS
+    assert not full["content_truncated"] and full["content"].endswith("turbine")
+
+
+def test_install_indexes_notes_written_without_the_index(api):
+    from app import fulltext
+    from app.compression import note_content
+
+    workspace_id = uuid.UUID(make_workspace(api, "W"))
+    body = "clause " * 5000 + "turbine"
+    with api.engine.begin() as conn:
+        conn.execute(models.Note.__table__.insert(),
+                     {"id": uuid.uuid4(), "workspace_id": workspace_id, "title": "old",
+                      **note_content(body)})
+    fulltext.install(api.engine)
+
+    response = api.client.get(f"/workspaces/{workspace_id}/notes/search", params={"q": "turbine"})
+    assert [hit["title"] for hit in response.json()["items"]] == ["old"]
+
+
+def test_note_search_pages_through_tied_scores(api):
+    from sqlalchemy.dialects import postgresql
+    from app import fulltext
+
+    workspace_id = make_workspace(api, "W")
+    api.client.post(f"/workspaces/{workspace_id}/notes:bulk",
+                    json=[{"title": "same", "content": "tender clause"} for _ in range(5)])
+    pages = [api.client.get(f"/workspaces/{workspace_id}/notes/search",
+                            params={"q": "clause", "limit": 2}).json()]
+    while pages[-1]["next_cursor"] and len(pages) < 10:
+        pages.append(api.client.get(f"/workspaces/{workspace_id}/notes/search", params={
+            "q": "clause", "limit": 2, "cursor": pages[-1]["next_cursor"]}).json())
+
+    ids = [hit["id"] for page in pages for hit in page["items"]]
+    assert len(ids) == 5 and len(set(ids)) == 5 and len(pages) == 3
+
+    # ts_rank is a float4; the cursor round-trips a float8, so compare as one
+    stmt = fulltext.search_notes_statement("postgresql", uuid.UUID(workspace_id), "clause",
+                                           after=(0.0607927, uuid.uuid4()))
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "CAST(ts_rank(note_search.document" in sql and "AS FLOAT(53))" in sql